@@ -6,15 +6,30 @@
 # This software is proprietary and confidential.
 # ============================================================================
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, Response, render_template, jsonify, request, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import json
 import csv
 import io
+import logging
+import math
 import os
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from data_loader import DataLoader
-from enhanced_csp_model import EnhancedCSPTimetable, Course, Instructor, Room, Timeslot
+from enhanced_csp_model import EnhancedCSPTimetable, Course, Instructor, Room, Timeslot, SOLVER_MODES
+from exact_solver import get_backend
+from result_cache import ResultCache, cache_key, dataset_fingerprint
+
+# Logging: quiet by default (warnings and errors only). TIMETABLE_LOG_LEVEL=INFO shows one
+# line per solve phase, DEBUG adds the per-session detail of the solver.
+LOG_LEVEL = os.environ.get('TIMETABLE_LOG_LEVEL', 'WARNING').upper()
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -33,6 +48,14 @@ data_loader = DataLoader()
 current_timetable = None
 data_loaded = False  # Track if user has uploaded data
 
+# Generated timetables keyed by dataset fingerprint + solver parameters. Any data edit
+# changes the fingerprint, so stale results are never served.
+RESULT_CACHE_DIR = os.environ.get('TIMETABLE_CACHE_DIR')  # Optional on-disk store
+result_cache = ResultCache(max_entries=32, directory=RESULT_CACHE_DIR)
+
+# Diagnostics of recent solves, for /api/solver/metrics
+solver_metrics = deque(maxlen=50)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -42,7 +65,7 @@ def initialize_data():
     """Load data from CSV files if they exist (DISABLED - require upload)"""
     global data_loaded
     data_loaded = False
-    print("⚠️ Auto-load disabled. Please upload CSV files to begin.")
+    logger.info("Auto-load disabled. Please upload CSV files to begin.")
     return False
 
 # Don't auto-load data - user must upload files first
@@ -114,15 +137,28 @@ def upload_files():
             
             uploaded_files[file_key] = file
         
+        # Cohorts (courses taken together) are optional
+        cohorts_file = request.files.get('cohorts')
+        if cohorts_file and cohorts_file.filename != '':
+            if not allowed_file(cohorts_file.filename):
+                return jsonify({'success': False, 'error': 'cohorts file must be CSV format'}), 400
+            uploaded_files['cohorts'] = cohorts_file
+        
         # Save files to uploads directory
         file_paths = {}
         file_mapping = {
             'courses': 'Courses.csv',
             'instructors': 'instructors.csv',
             'rooms': 'Rooms.csv',
-            'timeslots': 'TimeSlots.csv'
+            'timeslots': 'TimeSlots.csv',
+            'cohorts': 'Cohorts.csv'
         }
         
+        # A cohorts file from an earlier upload doesn't belong to the new data
+        stale_cohorts = os.path.join(app.config['UPLOAD_FOLDER'], file_mapping['cohorts'])
+        if 'cohorts' not in uploaded_files and os.path.exists(stale_cohorts):
+            os.remove(stale_cohorts)
+        
         for key, file in uploaded_files.items():
             filename = file_mapping[key]
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -134,7 +170,8 @@ def upload_files():
             file_paths['courses'],
             file_paths['instructors'],
             file_paths['rooms'],
-            file_paths['timeslots']
+            file_paths['timeslots'],
+            file_paths.get('cohorts')
         )
         
         data_loaded = True
@@ -206,6 +243,18 @@ def get_rooms():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/cohorts', methods=['GET'])
+def get_cohorts():
+    """Get all cohorts (groups of courses taken together)"""
+    try:
+        cohorts = data_loader.get_cohorts()
+        return jsonify({
+            'success': True,
+            'cohorts': [c.to_dict() for c in cohorts]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/timeslots', methods=['GET'])
 def get_timeslots():
     """Get all timeslots"""
@@ -307,7 +356,9 @@ def update_course(course_id):
             course_id,
             data.get('course_name'),
             data.get('credits'),
-            data.get('course_type')
+            data.get('course_type'),
+            data.get('enrollment'),
+            data.get('sections')
         )
         
         if success:
@@ -387,10 +438,228 @@ def update_timeslot():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def build_solver():
+    """Create a solver for ALL courses that have at least one qualified instructor"""
+    # Get ALL courses with qualified instructors (no manual selection!)
+    all_courses = data_loader.get_courses()
+    schedulable_courses = []
+    
+    logger.debug("Analyzing all %d courses", len(all_courses))
+    
+    # Count qualified instructors per course in a single pass over instructors
+    qualified_counts = Counter(
+        course_id
+        for instr in data_loader.get_instructors()
+        for course_id in set(instr.qualified_courses)
+    )
+    for course in all_courses:
+        if qualified_counts[course.course_id]:
+            schedulable_courses.append((course, qualified_counts[course.course_id]))
+    
+    # Sort by number of qualified instructors (better success rate)
+    schedulable_courses.sort(key=lambda x: x[1], reverse=True)
+    
+    # USE ALL SCHEDULABLE COURSES - NO LIMIT!
+    selected_courses = [course for course, count in schedulable_courses]
+    
+    if not selected_courses:
+        return None
+    
+    logger.info("Found %d schedulable courses (out of %d total)", len(selected_courses), len(all_courses))
+    
+    # Create solver with ALL time slots
+    return EnhancedCSPTimetable(
+        courses=selected_courses,
+        instructors=data_loader.get_instructors(),
+        rooms=data_loader.get_rooms(),
+        timeslots=data_loader.get_timeslots(),  # Uses ALL time slots
+        cohorts=data_loader.get_cohorts()
+    )
+
+def generation_cache_key(timeout, mode, pinned=(), targets=None, backend=None, improve=False, seed=None):
+    """Result cache key for the currently loaded data and these solver parameters"""
+    fingerprint = dataset_fingerprint(data_loader.get_courses(), data_loader.get_instructors(),
+                                      data_loader.get_rooms(), data_loader.get_timeslots(),
+                                      data_loader.get_cohorts())
+    pinned = sorted(json.dumps(entry, sort_keys=True) for entry in pinned)
+    params = {'backend': backend} if backend else {}  # Only exact solves have a backend
+    if improve:
+        params['improve'] = True
+    if seed is not None:
+        params['seed'] = seed
+    return cache_key(fingerprint, timeout=timeout, mode=mode, pinned=pinned, targets=targets or {}, **params)
+
+def parse_targets(data):
+    """Anytime targets of a generate request: target_rate in (0, 1] and target_soft_score"""
+    targets = {}
+    if data.get('target_rate') is not None:
+        target_rate = float(data['target_rate'])
+        if not 0 < target_rate <= 1:
+            raise ValueError('target_rate must be between 0 (exclusive) and 1')
+        targets['target_rate'] = target_rate
+    if data.get('target_soft_score') is not None:
+        targets['target_soft_score'] = float(data['target_soft_score'])
+    return targets
+
+def parse_time_limit(value, default):
+    """A time budget in seconds: a positive number, or `default` when missing/null"""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        raise TypeError('expected a number of seconds')
+    seconds = float(value)
+    if not (seconds > 0 and math.isfinite(seconds)):
+        raise ValueError('must be a positive number of seconds')
+    return seconds
+
+def parse_workers(value):
+    """A worker process count: a positive integer, or None (all cores) when missing/null"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError('expected an integer')
+    if value < 1:
+        raise ValueError('must be at least 1')
+    return value
+
+def restore_cached_generation(solver, result):
+    """Publish a cached result as the current timetable and return it"""
+    global current_timetable
+    
+    solver.load_result(result)  # Seed, targets and diagnostics too, so exports match the original solve
+    current_timetable = solver
+    logger.info("Using cached timetable: %d/%d courses", result['scheduled_courses'], result['total_courses'])
+    return dict(result, cached=True)
+
+def record_solver_metrics(mode, timeout, result):
+    """Remember the diagnostics of a finished solve"""
+    diagnostics = result.get('diagnostics', {})
+    solver_metrics.append({
+        'finished_at': time.time(),
+        'mode': mode,
+        'timeout': timeout,
+        'sessions': result['total_courses'],
+        'scheduled': result['scheduled_courses'],
+        'seconds': diagnostics.get('phases', {}).get('total', {}).get('seconds'),
+        'diagnostics': diagnostics
+    })
+
+def run_generation(solver, timeout, mode, workers, key=None, profile=False, targets=None, improve=False,
+                   seed=None):
+    """Run the solver, publish it as the current timetable and return the exported result
+    
+    With a cache key the result is also stored in the result cache. With profile=True
+    the diagnostics include a cProfile summary. targets (see parse_targets) let the
+    solver return before the timeout. improve=True spends the time left on lowering
+    the soft score. seed fixes the solver's randomness (a fresh one when None).
+    """
+    global current_timetable
+    
+    logger.info("Starting generation (mode: %s, timeout: %s seconds, seed: %s)", mode, timeout, seed)
+    solver.solve_enhanced(timeout_seconds=timeout, mode=mode, workers=workers, profile=profile, improve=improve,
+                          seed=seed, **(targets or {}))
+    
+    # Store current timetable
+    current_timetable = solver
+    
+    # Export results
+    result = solver.export_to_dict()
+    
+    scheduled = result["scheduled_courses"]
+    total = result["total_courses"]
+    percentage = (scheduled / total * 100) if total > 0 else 0
+    
+    result['message'] = f'Successfully scheduled {scheduled} out of {total} courses ({percentage:.1f}%)'
+    
+    logger.info("Generation complete: %d/%d courses (%.1f%%)", scheduled, total, percentage)
+    
+    record_solver_metrics(mode, timeout, result)
+    if key is not None:
+        result_cache.put(key, result)
+    return dict(result, cached=False)
+
+# ============================================================================
+# BACKGROUND GENERATION JOBS
+# ============================================================================
+
+job_executor = ThreadPoolExecutor(max_workers=2)
+generation_jobs = {}
+jobs_lock = threading.Lock()
+jobs_changed = threading.Condition(jobs_lock)  # Wakes up event streams when a job changes
+MAX_FINISHED_JOBS = 50  # Finished jobs kept around for polling
+
+def create_job():
+    """Register a new queued generation job and return its id"""
+    job_id = uuid.uuid4().hex
+    with jobs_lock:
+        # Forget the oldest finished jobs so the registry doesn't grow forever
+        finished = [j for j in generation_jobs.values() if j['status'] in ('finished', 'failed')]
+        for job in sorted(finished, key=lambda j: j['created_at'])[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del generation_jobs[job['job_id']]
+        
+        generation_jobs[job_id] = {
+            'job_id': job_id,
+            'status': 'queued',
+            'created_at': time.time(),
+            'progress': {},
+            'events': [],  # (event, data) in order - replayed by /api/jobs/<id>/events
+            'result': None,
+            'error': None
+        }
+    return job_id
+
+def update_job(job_id, **fields):
+    """Update a job record under the registry lock"""
+    with jobs_changed:
+        job = generation_jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+            jobs_changed.notify_all()
+
+def record_job_event(job_id, event, data):
+    """Append a solver event to a job and fold it into the job's latest progress"""
+    with jobs_changed:
+        job = generation_jobs.get(job_id)
+        if job is not None:
+            if event not in ('delta', 'result', 'failed'):  # Only solver events are progress
+                job['progress'].update(data, event=event)
+            job['events'].append((event, data))
+            jobs_changed.notify_all()
+
+def run_generation_job(job_id, solver, timeout, mode, workers, key=None, profile=False, targets=None,
+                       improve=False, seed=None):
+    """Executor task: run one generation job and record progress and the result"""
+    solver.add_progress_callback(lambda event, data: record_job_event(job_id, event, data))
+    update_job(job_id, status='running', started_at=time.time())
+    try:
+        result = run_generation(solver, timeout, mode, workers, key, profile, targets, improve, seed)
+        # The schedule itself was already streamed as 'delta' events
+        record_job_event(job_id, 'result', {k: v for k, v in result.items() if k != 'schedule'})
+        update_job(job_id, status='finished', finished_at=time.time(), result=result)
+    except Exception as e:
+        logger.exception("Error generating timetable: %s", e)
+        record_job_event(job_id, 'failed', {'error': str(e)})
+        update_job(job_id, status='failed', finished_at=time.time(), error=str(e))
+
 @app.route('/api/generate', methods=['POST'])
 def generate_timetable():
-    """Generate a new timetable - AUTO-SCHEDULES ALL COURSES"""
-    global current_timetable, data_loaded
+    """Generate a new timetable - AUTO-SCHEDULES ALL COURSES
+    
+    Runs as a background job: returns a job id right away, poll GET /api/jobs/<id>
+    for progress and the result. Send {"wait": true} to block until it finishes.
+    
+    If the same data was already solved with the same parameters the stored result
+    is returned right away (with "cached": true). Send {"use_cache": false} to re-solve.
+    
+    The solve always returns within "timeout" seconds with the best timetable found.
+    "target_rate" (share of sessions placed) and "target_soft_score" (upper bound)
+    let it return as soon as the result is good enough. "improve": true spends the
+    remaining time on a neighbourhood search that lowers the soft score.
+    
+    Every result carries the "seed" it was solved with; sending it back as "seed"
+    replays the solve (same data, parameters and stopping point).
+    """
+    global data_loaded
     
     # Check if data has been loaded
     if not data_loaded:
@@ -401,71 +670,150 @@ def generate_timetable():
     
     try:
         data = request.get_json() if request.get_json() else {}
-        timeout = data.get('timeout', 60)  # Reduced to 60 seconds (greedy algorithm is MUCH faster)
-        
-        # Get ALL courses with qualified instructors (no manual selection!)
-        all_courses = data_loader.get_courses()
-        schedulable_courses = []
-        
-        print(f"\n🔍 Analyzing all {len(all_courses)} courses...")
-        
-        for course in all_courses:
-            qualified = [instr for instr in data_loader.get_instructors() 
-                        if course.course_id in instr.qualified_courses]
-            if qualified:
-                schedulable_courses.append((course, len(qualified)))
+        timeout = data.get('timeout')  # Seconds, default 60 (greedy algorithm is MUCH faster)
+        mode = data.get('mode', 'greedy')  # 'greedy' (fast), 'backtrack' (complete search), 'parallel', 'decomposed' or 'exact'
+        backend = data.get('backend')  # 'exact' mode only: 'cpsat' or 'pulp' (default: the first one installed)
+        workers = data.get('workers')  # Worker processes for 'parallel' and 'decomposed' modes (default: all cores)
+        pinned = data.get('pinned') or []  # Fixed sessions: [{course_id, section_id, day, start_time, room_id, instructor_id}]
+        profile = bool(data.get('profile'))  # Add a cProfile summary to the diagnostics (always re-solves)
+        improve = bool(data.get('improve'))  # Lower the soft score with the time left after construction
+        seed = data.get('seed')  # Fixed random seed for a reproducible solve (default: a fresh one)
         
-        # Sort by number of qualified instructors (better success rate)
-        schedulable_courses.sort(key=lambda x: x[1], reverse=True)
-        
-        # USE ALL SCHEDULABLE COURSES - NO LIMIT!
-        selected_courses = [course for course, count in schedulable_courses]
+        if mode not in SOLVER_MODES:
+            return jsonify({'success': False, 'error': f'Unknown solver mode: {mode}'}), 400
+        try:
+            timeout = parse_time_limit(timeout, 60)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid timeout: {e}'}), 400
+        try:
+            workers = parse_workers(workers)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid workers: {e}'}), 400
+        try:
+            targets = parse_targets(data)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid target: {e}'}), 400
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return jsonify({'success': False, 'error': 'seed must be an integer'}), 400
+        if mode == 'exact':
+            try:
+                backend = get_backend(backend).name
+            except (ValueError, RuntimeError) as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+        else:
+            backend = None
         
-        if not selected_courses:
+        solver = build_solver()
+        if solver is None:
             return jsonify({'success': False, 'error': 'No courses with qualified instructors found'}), 400
         
-        print(f"✅ Found {len(selected_courses)} schedulable courses (out of {len(all_courses)} total)")
-        print(f"🚀 Attempting to schedule ALL {len(selected_courses)} courses across ALL available time slots...")
-        print(f"⏱️  Timeout: {timeout} seconds")
-        
-        # Create and run solver with ALL time slots
-        solver = EnhancedCSPTimetable(
-            courses=selected_courses,
-            instructors=data_loader.get_instructors(),
-            rooms=data_loader.get_rooms(),
-            timeslots=data_loader.get_timeslots()  # Uses ALL time slots
-        )
+        solver.exact_backend = backend
+        if pinned:
+            try:
+                solver.pin_assignments(pinned)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
         
-        print(f"\n{'='*80}")
-        print(f"🚀 STARTING ENHANCED CSP SOLVER")
-        print(f"{'='*80}")
-        success = solver.solve_enhanced(timeout_seconds=timeout)
+        key = generation_cache_key(timeout, mode, pinned, targets, backend, improve, seed)
+        cached = result_cache.get(key) if data.get('use_cache', True) and not profile else None
+        if cached is not None:
+            return jsonify(restore_cached_generation(solver, cached))
         
-        # Store current timetable
-        current_timetable = solver
+        if data.get('wait'):
+            return jsonify(run_generation(solver, timeout, mode, workers, key, profile, targets, improve, seed))
         
-        # Export results
-        result = solver.export_to_dict()
+        job_id = create_job()
+        job_executor.submit(run_generation_job, job_id, solver, timeout, mode, workers, key, profile, targets, improve,
+                            seed)
         
-        scheduled = result["scheduled_courses"]
-        total = result["total_courses"]
-        percentage = (scheduled / total * 100) if total > 0 else 0
-        
-        result['message'] = f'Successfully scheduled {scheduled} out of {total} courses ({percentage:.1f}%)'
-        
-        print(f"\n{'='*80}")
-        print(f"✅ GENERATION COMPLETE")
-        print(f"📊 Result: {scheduled}/{total} courses ({percentage:.1f}%)")
-        print(f"{'='*80}\n")
-        
-        return jsonify(result)
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
         
     except Exception as e:
-        print(f"❌ Error generating timetable: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating timetable: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status, progress and (once finished) result of a generation job"""
+    with jobs_lock:
+        job = generation_jobs.get(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        job = {k: v for k, v in job.items() if k != 'events'}
+        job['progress'] = dict(job['progress'])
+    
+    return jsonify({'success': job['status'] != 'failed', **job})
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream a job's solver events as Server-Sent Events
+    
+    Events: started, attempt, progress, best, delta (schedule changes), finished,
+    then result (export without the schedule) or failed. Reconnecting clients
+    resume after the Last-Event-ID they received.
+    """
+    with jobs_lock:
+        if job_id not in generation_jobs:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    try:
+        next_index = max(0, int(request.headers.get('Last-Event-ID', -1)) + 1)
+    except ValueError:
+        next_index = 0  # Not an id we sent: replay from the start
+    
+    def event_stream(index):
+        while True:
+            with jobs_changed:
+                job = generation_jobs.get(job_id)
+                if job is None:
+                    return
+                if index >= len(job['events']) and job['status'] in ('queued', 'running'):
+                    jobs_changed.wait(timeout=15)
+                events = job['events'][index:]
+                done = job['status'] in ('finished', 'failed')
+            
+            if not events and not done:
+                yield ': keep-alive\n\n'
+            for event, data in events:
+                yield f'id: {index}\nevent: {event}\ndata: {json.dumps(data)}\n\n'
+                index += 1
+            if done and not events:
+                return
+    
+    return Response(event_stream(next_index), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/solver/metrics', methods=['GET'])
+def get_solver_metrics():
+    """Phase timings and counters of recent solves, summarized per mode"""
+    runs = list(solver_metrics)
+    
+    summary = {}
+    for mode in sorted({run['mode'] for run in runs}):
+        mode_runs = [run for run in runs if run['mode'] == mode]
+        seconds = [run['seconds'] for run in mode_runs if run['seconds'] is not None]
+        summary[mode] = {
+            'runs': len(mode_runs),
+            'avg_seconds': round(sum(seconds) / len(seconds), 3) if seconds else None,
+            'max_seconds': round(max(seconds), 3) if seconds else None,
+            'avg_placement_rate': round(sum(run['scheduled'] / run['sessions'] for run in mode_runs
+                                            if run['sessions']) / len(mode_runs), 4)
+        }
+    
+    return jsonify({
+        'success': True,
+        'latest': runs[-1] if runs else None,
+        'summary': summary,
+        'runs': [{k: v for k, v in run.items() if k != 'diagnostics'} for run in runs],
+        'cache': result_cache.stats(),
+        'cpu_count': os.cpu_count()
+    })
+
 @app.route('/api/timetable/current', methods=['GET'])
 def get_current_timetable():
     """Get the current timetable"""
@@ -480,6 +828,46 @@ def get_current_timetable():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/timetable/resolve', methods=['POST'])
+def resolve_timetable():
+    """Re-solve the current timetable after data edits (warm start)
+    
+    Sessions that are still valid stay where they are; only the ones invalidated by
+    the edits (deleted room or timeslot, changed qualification...) are rescheduled.
+    Pinned sessions stay pinned unless the edits broke them ("unpinned" in the report).
+    """
+    global current_timetable
+    
+    if current_timetable is None:
+        return jsonify({'success': False, 'error': 'No timetable generated yet'}), 404
+    
+    try:
+        data = request.get_json() if request.get_json(silent=True) else {}
+        try:
+            time_limit = parse_time_limit(data.get('time_limit'), 5)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid time_limit: {e}'}), 400
+        
+        previous = current_timetable.export_to_dict()['schedule']
+        solver = build_solver()
+        if solver is None:
+            return jsonify({'success': False, 'error': 'No courses with qualified instructors found'}), 400
+        
+        report = solver.resolve_incremental(previous, time_limit=time_limit,
+                                            pinned=current_timetable.pinned_entries)
+        current_timetable = solver
+        
+        result = solver.export_to_dict()
+        result['incremental'] = report
+        record_solver_metrics('incremental', time_limit, result)
+        result['message'] = (f"Kept {report['kept']} sessions, rescheduled {report['rescheduled']} "
+                             f"({len(report['invalidated'])} invalidated by edits"
+                             + (f", {len(report['unpinned'])} pins dropped)" if report['unpinned'] else ")"))
+        return jsonify(result)
+    except Exception as e:
+        logger.exception("Error re-solving timetable: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/timetable/export/csv', methods=['GET'])
 def export_timetable_csv():
     """Export current timetable as CSV"""
@@ -580,7 +968,11 @@ def add_course():
             return jsonify({'success': False, 'error': 'Course ID already exists'}), 400
         
         # Add course
-        new_course = Course(data['course_id'], data['name'], data['credits'], data['type'])
+        try:
+            new_course = Course(data['course_id'], data['name'], data['credits'], data['type'],
+                                data.get('enrollment'), data.get('sections'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f'Invalid enrollment or sections: {e}'}), 400
         data_loader.courses.append(new_course)
         
         # Save to CSV using data_loader method
@@ -605,11 +997,13 @@ def reload_data():
         
         # Check if uploaded files exist
         if all(os.path.exists(f) for f in upload_files):
+            cohorts_path = os.path.join(UPLOAD_FOLDER, 'Cohorts.csv')
             data_loader.load_all_data(
                 upload_files[0],
                 upload_files[1],
                 upload_files[2],
-                upload_files[3]
+                upload_files[3],
+                cohorts_path if os.path.exists(cohorts_path) else None
             )
             data_loaded = True
             return jsonify({
@@ -630,7 +1024,8 @@ def reload_data():
                 root_files[0],
                 root_files[1],
                 root_files[2],
-                root_files[3]
+                root_files[3],
+                'Cohorts.csv' if os.path.exists('Cohorts.csv') else None
             )
             data_loaded = True
             return jsonify({
@@ -649,7 +1044,7 @@ def reload_data():
         return jsonify({'success': False, 'error': 'No CSV files found. Please upload data first.'}), 404
         
     except Exception as e:
-        print(f"Error reloading data: {e}")
+        logger.error("Error reloading data: %s", e)
         data_loaded = False
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -670,6 +1065,9 @@ def internal_error(error):
 # ============================================================================
 
 if __name__ == '__main__':
+    if 'TIMETABLE_LOG_LEVEL' not in os.environ:
+        logging.getLogger().setLevel(logging.INFO)  # Show solver progress on the dev server
+    
     print("\n" + "="*80)
     print("🎓 CSP TIMETABLEAI - INTELLIGENT SCHEDULING SYSTEM")
     print("   © 2025 Kareem. All Rights Reserved.")
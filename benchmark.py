@@ -0,0 +1,276 @@
+# benchmark.py - Solver benchmarks on synthetic university datasets
+#
+# Usage:
+#   python benchmark.py                                  # default size grid, greedy mode
+#   python benchmark.py --sizes 50,100,200 --modes greedy,parallel --repeats 3 -o results.json
+#   python benchmark.py --sizes 300 --write-data bench_data   # also write the CSVs (uploadable)
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from enhanced_csp_model import (EnhancedCSPTimetable, Cohort, Course, Instructor, Room, Timeslot,
+                                SOLVER_MODES, SLOT_ORDER, LECTURER_ROLES, TA_ROLE)
+
+DAYS = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday"]
+SLOT_TIMES = [("9:00 AM", "10:30 AM"), ("10:45 AM", "12:15 PM"), ("12:30 PM", "2:00 PM"), ("2:15 PM", "3:45 PM")]
+DEFAULT_MIX = {"Lecture": 0.40, "Lab": 0.05, "Lecture and Lab": 0.55}  # Roughly the sample catalog
+
+
+def generate_dataset(n_courses, mix=None, qualified_per_course=2.0, ta_ratio=0.5,
+                     instructors_per_course=0.55, room_scarcity=0.6, unavailable_rate=0.8, max_enrollment=0,
+                     cohort_size=0, seed=0):
+    """Build a synthetic (courses, instructors, rooms, timeslots, cohorts) problem
+
+    - mix: share of 'Lecture', 'Lab' and 'Lecture and Lab' courses
+    - qualified_per_course: average qualified lecturers (and TAs, for lab sessions) per course
+    - ta_ratio: share of instructors who are Teaching Assistants
+    - instructors_per_course: instructors in the pool per course
+    - room_scarcity: share of a room type's (timeslot, room) cells the sessions would fill
+    - unavailable_rate: share of instructors with a 'Not on <Day>' restriction
+    - max_enrollment: when set, every course gets 10..max_enrollment students and is
+      split into sections that fit the largest room of each type
+    - cohort_size: when set, the courses are dealt into cohorts of this many courses
+      that must not share a timeslot
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+
+    timeslots = [Timeslot(day, start, end) for day in DAYS for start, end in SLOT_TIMES]
+
+    types = list(mix)
+    courses = [
+        Course(f"SYN{i + 1:04d}", f"Synthetic Course {i + 1}", rng.choice([2, 3, 3, 4]),
+               rng.choices(types, weights=[mix[t] for t in types])[0])
+        for i in range(n_courses)
+    ]
+    if max_enrollment:
+        for course in courses:
+            course.enrollment = rng.randint(10, max(10, max_enrollment))
+
+    n_instructors = max(2, round(n_courses * instructors_per_course))
+    n_tas = min(n_instructors - 1, max(1, round(n_instructors * ta_ratio)))
+    instructors = []
+    for i in range(n_instructors):
+        role = TA_ROLE if i < n_tas else rng.choice(LECTURER_ROLES)
+        title = {"Professor": "Prof.", "Doctor": "Dr."}.get(role, "Eng.")
+        unavailable = f"Not on {rng.choice(DAYS + ['Friday', 'Saturday'])}" if rng.random() < unavailable_rate else ""
+        instructors.append(Instructor(f"SYN-INS{i + 1:03d}", f"{title} Synthetic {i + 1}", role, unavailable, []))
+
+    # Every session type a course needs gets about qualified_per_course instructors of the right role
+    tas = [ins for ins in instructors if ins.role == TA_ROLE]
+    lecturers = [ins for ins in instructors if ins.role != TA_ROLE]
+    for course in courses:
+        pools = []
+        if course.type == "Lab" or "and" in course.type.lower():
+            pools.append(tas)
+        if course.type != "Lab":
+            pools.append(lecturers)
+        for pool in pools:
+            count = max(1, min(len(pool), round(rng.expovariate(1 / qualified_per_course)) or 1))
+            for instructor in rng.sample(pool, count):
+                instructor.qualified_courses.append(course.course_id)
+
+    # Size each room pool so the sessions fill `room_scarcity` of its cells. The first room
+    # of each type is the largest, which is what the solver sizes sections by
+    def sections(course, capacities):
+        return math.ceil(course.enrollment / max(capacities)) if course.enrollment else 1
+
+    lecture_capacities, lab_capacities = [40, 50, 60, 100, 200], [25, 30, 35]
+    lecture_sessions = sum(sections(c, lecture_capacities) for c in courses if c.type != "Lab")
+    lab_sessions = sum(sections(c, lab_capacities) for c in courses if c.type == "Lab" or "and" in c.type.lower())
+    rooms = []
+    for room_type, sessions, capacities in (("Lecture", lecture_sessions, lecture_capacities),
+                                            ("Lab", lab_sessions, lab_capacities)):
+        n_rooms = max(1, math.ceil(sessions / (len(timeslots) * room_scarcity)))
+        rooms.extend(Room(f"SYN-{room_type[:3].upper()}{i + 1:03d}", room_type,
+                          max(capacities) if i == 0 and max_enrollment else rng.choice(capacities))
+                     for i in range(n_rooms))
+
+    cohorts = []
+    if cohort_size:
+        shuffled = rng.sample(courses, len(courses))
+        cohorts = [Cohort(f"SYN-COH{n + 1:03d}", [c.course_id for c in shuffled[i:i + cohort_size]])
+                   for n, i in enumerate(range(0, len(shuffled), cohort_size))]
+
+    return courses, instructors, rooms, timeslots, cohorts
+
+
+def write_dataset(directory, courses, instructors, rooms, timeslots, cohorts=()):
+    """Write a dataset as the CSV files the app's upload expects (Cohorts.csv only when there are cohorts)"""
+    os.makedirs(directory, exist_ok=True)
+    tables = [
+        ("Courses.csv", ["CourseID", "CourseName", "Credits", "Type", "Enrollment", "Sections"],
+         [[c.course_id, c.name, c.credits, c.type, c.enrollment or "", c.sections or ""] for c in courses]),
+        ("instructors.csv", ["InstructorID", "Name", "Role", "PreferredSlots", "QualifiedCourses"],
+         [[i.instructor_id, i.name, i.role, i.unavailable_day, ",".join(i.qualified_courses)] for i in instructors]),
+        ("Rooms.csv", ["RoomID", "Type", "Capacity"],
+         [[r.room_id, r.type, r.capacity] for r in rooms]),
+        ("TimeSlots.csv", ["Day", "StartTime", "EndTime"],
+         [[t.day, t.start_time, t.end_time] for t in timeslots]),
+    ]
+    if cohorts:
+        tables.append(("Cohorts.csv", ["CohortID", "Courses"],
+                       [[c.cohort_id, ",".join(c.course_ids)] for c in cohorts]))
+    for filename, header, rows in tables:
+        with open(os.path.join(directory, filename), "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def _solve(dataset, mode, timeout, workers, seed, improve=False):
+    solver = EnhancedCSPTimetable(*dataset)
+    solver.solve_enhanced(timeout_seconds=timeout, mode=mode, workers=workers, improve=improve, seed=seed)
+    return solver
+
+
+def run_case(dataset, mode, timeout, workers=None, seed=0, trace_memory=True, improve=False):
+    """Solve one dataset and return its measurements
+
+    With improve=True the solver spends its whole timeout (see improve_soft_score) and
+    the record adds the soft score before the neighbourhood search and its history.
+    tracemalloc slows the solver down several times, so peak memory comes from a
+    second, traced run with the same seed and the wall time from an untraced one.
+    Only the main process is traced (parallel workers are not included).
+    """
+    start = time.perf_counter()
+    solver = _solve(dataset, mode, timeout, workers, seed, improve)
+    wall_time = time.perf_counter() - start
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            _solve(dataset, mode, timeout, workers, seed, improve)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    total = len(solver.variables)
+    placed = len(solver.assignments)
+    record = {
+        "seed": seed,
+        "sessions": total,
+        "placed": placed,
+        "placement_rate": round(placed / total, 4) if total else 0.0,
+        "max_schedulable": solver.preprocessing["max_schedulable"] if solver.preprocessing else None,
+        "soft_score": solver.schedule_soft_score(),
+        "wall_time_s": round(wall_time, 4),
+        "peak_memory_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+    }
+    if solver.improvement_report:
+        record["initial_soft_score"] = solver.improvement_report["initial_soft_score"]
+        record["soft_score_history"] = solver.improvement_report["history"]
+    return record
+
+
+def run_benchmark(sizes, modes, repeats=1, timeout=60, workers=None, seed=0, trace_memory=True,
+                  generator_options=None, write_data=None, improve=False):
+    """Run every mode on a synthetic dataset of every size and return the records"""
+    generator_options = generator_options or {}
+    results = []
+    for size in sizes:
+        dataset = generate_dataset(size, seed=seed, **generator_options)
+        if write_data:
+            write_dataset(os.path.join(write_data, f"size_{size}"), *dataset)
+        for mode in modes:
+            for repeat in range(repeats):
+                record = {"size": size, "mode": mode, "repeat": repeat}
+                record.update(run_case(dataset, mode, timeout, workers, seed + repeat, trace_memory, improve))
+                results.append(record)
+                print(f"  size={size:<5} mode={mode:<10} run={repeat + 1}/{repeats}  "
+                      f"{record['placed']}/{record['sessions']} placed  "
+                      f"{record['wall_time_s']:.2f}s  soft={record['soft_score']}"
+                      + (f"  peak={record['peak_memory_mb']}MB" if record['peak_memory_mb'] is not None else ""),
+                      file=sys.stderr)
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the timetable solver on synthetic datasets")
+    parser.add_argument("--sizes", default="50,100,200", help="comma-separated course counts")
+    parser.add_argument("--modes", default="greedy", help=f"comma-separated solver modes ({', '.join(SOLVER_MODES)})")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for parallel modes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default=None,
+                        help="course type shares as lecture,lab,lecture_and_lab (e.g. 0.4,0.05,0.55)")
+    parser.add_argument("--qualified", type=float, default=2.0, help="average qualified instructors per course")
+    parser.add_argument("--ta-ratio", type=float, default=0.5, help="share of instructors who are TAs")
+    parser.add_argument("--room-scarcity", type=float, default=0.6, help="share of room cells sessions would fill")
+    parser.add_argument("--max-enrollment", type=int, default=0,
+                        help="give courses 10..N students and split them into sections (0: one section each)")
+    parser.add_argument("--cohort-size", type=int, default=0,
+                        help="deal the courses into cohorts of N courses that must not share a timeslot (0: none)")
+    parser.add_argument("--improve", action="store_true",
+                        help="spend the rest of the timeout lowering the soft score (neighbourhood search)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the extra tracemalloc run for peak memory")
+    parser.add_argument("--write-data", default=None, help="also write each dataset as CSVs under this folder")
+    parser.add_argument("-o", "--output", default=None, help="JSON file for the results (default: stdout)")
+    parser.add_argument("--log-level", default="ERROR", help="solver log level (e.g. INFO, DEBUG)")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s %(name)s: %(message)s")
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in SOLVER_MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+    generator_options = {
+        "qualified_per_course": args.qualified,
+        "ta_ratio": args.ta_ratio,
+        "room_scarcity": args.room_scarcity,
+        "max_enrollment": args.max_enrollment,
+        "cohort_size": args.cohort_size,
+    }
+    if args.mix:
+        shares = [float(x) for x in args.mix.split(",")]
+        generator_options["mix"] = dict(zip(("Lecture", "Lab", "Lecture and Lab"), shares))
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    # Progress goes to stderr so stdout stays pure JSON when there is no -o
+    print(f"🏁 Benchmarking modes {', '.join(modes)} on sizes {', '.join(map(str, sizes))}", file=sys.stderr)
+    results = run_benchmark(sizes, modes, args.repeats, args.timeout, args.workers, args.seed,
+                            not args.no_memory, generator_options, args.write_data, args.improve)
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "sizes": sizes, "modes": modes, "repeats": args.repeats, "timeout": args.timeout,
+            "workers": args.workers, "seed": args.seed, "memory_traced": not args.no_memory, "improve": args.improve,
+            "generator": generator_options, "slots_per_day": len(SLOT_ORDER), "days": DAYS,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"💾 Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
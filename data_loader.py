@@ -1,6 +1,9 @@
 # data_loader.py (using built-in csv module - NO PANDAS)
 import csv
-from enhanced_csp_model import Course, Instructor, Room, Timeslot
+import logging
+from enhanced_csp_model import Cohort, Course, Instructor, Room, Timeslot, parse_positive_int
+
+logger = logging.getLogger(__name__)
 
 class DataLoader:
     def __init__(self):
@@ -8,15 +11,20 @@ class DataLoader:
         self.instructors = []
         self.rooms = []
         self.timeslots = []
+        self.cohorts = []
 
-    def load_all_data(self, courses_path, instructors_path, rooms_path, timeslots_path):
-        """Loads all data from the provided CSV file paths using built-in csv module."""
+    def load_all_data(self, courses_path, instructors_path, rooms_path, timeslots_path, cohorts_path=None):
+        """Loads all data from the provided CSV file paths using built-in csv module.
+        
+        cohorts_path is optional: a CSV of CohortID,Courses rows listing courses taken together.
+        """
         try:
             # Clear existing data before reloading
             self.courses = []
             self.instructors = []
             self.rooms = []
             self.timeslots = []
+            self.cohorts = []
             
             # Load Courses
             with open(courses_path, 'r', encoding='utf-8') as file:
@@ -26,7 +34,9 @@ class DataLoader:
                         row['CourseID'], 
                         row['CourseName'], 
                         row['Credits'], 
-                        row['Type']
+                        row['Type'],
+                        row.get('Enrollment'),  # Optional columns: students and fixed section count
+                        row.get('Sections')
                     ))
             
             # Load Instructors
@@ -61,13 +71,24 @@ class DataLoader:
                         row['EndTime']
                     ))
             
-            print("All data loaded successfully using CSV module!")
-            print(f"Loaded {len(self.courses)} courses, {len(self.instructors)} instructors, {len(self.rooms)} rooms, {len(self.timeslots)} timeslots")
+            # Load Cohorts (optional)
+            if cohorts_path:
+                with open(cohorts_path, 'r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    for row in reader:
+                        self.cohorts.append(Cohort(
+                            row['CohortID'],
+                            row['Courses']
+                        ))
+            
+            logger.info("Loaded %d courses, %d instructors, %d rooms, %d timeslots, %d cohorts",
+                        len(self.courses), len(self.instructors), len(self.rooms), len(self.timeslots),
+                        len(self.cohorts))
             
         except FileNotFoundError as e:
-            print(f"Error loading data: {e}")
+            logger.error("Error loading data: %s", e)
         except Exception as e:
-            print(f"Unexpected error: {e}")
+            logger.exception("Unexpected error loading data: %s", e)
 
     def get_courses(self):
         return self.courses
@@ -81,6 +102,9 @@ class DataLoader:
     def get_timeslots(self):
         return self.timeslots
 
+    def get_cohorts(self):
+        return self.cohorts
+
     # ============================================================================
     # CRUD OPERATIONS (Create, Read, Update, Delete)
     # ============================================================================
@@ -89,18 +113,20 @@ class DataLoader:
         """Save courses to CSV file"""
         try:
             with open(filepath, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=['CourseID', 'CourseName', 'Credits', 'Type'])
+                writer = csv.DictWriter(file, fieldnames=['CourseID', 'CourseName', 'Credits', 'Type', 'Enrollment', 'Sections'])
                 writer.writeheader()
                 for course in self.courses:
                     writer.writerow({
                         'CourseID': course.course_id,
                         'CourseName': course.name,  # Fixed: use course.name not course.course_name
                         'Credits': course.credits,
-                        'Type': course.type  # Fixed: use course.type not course.course_type
+                        'Type': course.type,  # Fixed: use course.type not course.course_type
+                        'Enrollment': course.enrollment or '',
+                        'Sections': course.sections or ''
                     })
             return True
         except Exception as e:
-            print(f"Error saving courses: {e}")
+            logger.error("Error saving courses: %s", e)
             return False
 
     def save_instructors_to_csv(self, filepath='uploads/instructors.csv'):
@@ -128,7 +154,7 @@ class DataLoader:
                     })
             return True
         except Exception as e:
-            print(f"Error saving instructors: {e}")
+            logger.error("Error saving instructors: %s", e)
             return False
 
     def save_rooms_to_csv(self, filepath='uploads/Rooms.csv'):
@@ -145,7 +171,7 @@ class DataLoader:
                     })
             return True
         except Exception as e:
-            print(f"Error saving rooms: {e}")
+            logger.error("Error saving rooms: %s", e)
             return False
 
     def save_timeslots_to_csv(self, filepath='uploads/TimeSlots.csv'):
@@ -162,7 +188,7 @@ class DataLoader:
                     })
             return True
         except Exception as e:
-            print(f"Error saving timeslots: {e}")
+            logger.error("Error saving timeslots: %s", e)
             return False
 
     def delete_course(self, course_id):
@@ -185,13 +211,17 @@ class DataLoader:
         self.timeslots = [t for t in self.timeslots if not (t.day == day and t.start_time == start_time)]
         return self.save_timeslots_to_csv()
 
-    def update_course(self, course_id, course_name, credits, course_type):
-        """Update a course"""
+    def update_course(self, course_id, course_name, credits, course_type, enrollment=None, sections=None):
+        """Update a course (enrollment/sections: None keeps the current value, 0 clears it)"""
         for course in self.courses:
             if course.course_id == course_id:
                 course.name = course_name  # Fixed: use course.name not course.course_name
                 course.credits = credits
                 course.type = course_type  # Fixed: use course.type not course.course_type
+                if enrollment is not None:
+                    course.enrollment = parse_positive_int(enrollment)
+                if sections is not None:
+                    course.sections = parse_positive_int(sections)
                 return self.save_courses_to_csv()
         return False
 
@@ -228,6 +258,7 @@ class DataLoader:
 
 # Test the data loader
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     loader = DataLoader()
     loader.load_all_data('Courses.csv', 'instructors.csv', 'Rooms.csv', 'TimeSlots.csv')
     
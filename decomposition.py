@@ -0,0 +1,170 @@
+# decomposition.py - Solve independent parts of the timetable separately
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+
+from parallel_solver import pool_context
+
+logger = logging.getLogger(__name__)
+
+
+def interaction_components(solver):
+    """Split the sessions into groups that share no instructor and no course
+
+    Two sessions interact when they are sections of the same course, when their
+    courses share a cohort or when some instructor could teach both. Sessions in
+    different components can only compete for rooms. Returns a list of variable
+    lists, largest first.
+    """
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for course_id, others in solver.cohort_courses.items():
+        for other_id in others:
+            parent[find(("course", other_id))] = find(("course", course_id))
+
+    for variable in solver.variables:
+        course_node = find(("course", variable.course_id))
+        _, instructor_ids = solver._domain_entities(variable)  # No need to decode the domain
+        for instructor_id in instructor_ids:
+            parent[find(("instructor", instructor_id))] = course_node
+            course_node = find(course_node)
+
+    components = defaultdict(list)
+    for variable in solver.variables:
+        components[find(("course", variable.course_id))].append(variable)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def group_components(components, n_groups):
+    """Pack components into at most n_groups balanced groups (largest component first)"""
+    groups = [[] for _ in range(min(n_groups, len(components)))]
+    for component in components:
+        min(groups, key=len).extend(component)
+    return [group for group in groups if group]
+
+
+def allocate_room_cells(solver, groups):
+    """Share each room type's (timeslot, room) cells between the groups that need it
+
+    Cells are handed out slot by slot to the group furthest below its share of the
+    demand, so every group gets rooms on every day. A pinned session's cell always
+    goes to its own group. Returns, per group, the set of (timeslot.id, room_id)
+    cells it must leave alone.
+    """
+    demand = [defaultdict(int) for _ in groups]
+    pinned_cells = {}
+    for index, group in enumerate(groups):
+        for variable in group:
+            if variable in solver.unschedulable:
+                continue
+            demand[index][solver.required_room_type(variable)] += 1
+            if variable in solver.pinned:
+                timeslot, room, _ = solver.pinned[variable]
+                pinned_cells[(timeslot.id, room.room_id)] = index
+
+    blocked = [set() for _ in groups]
+    for room_type, rooms in solver.rooms_by_type.items():
+        wanting = [index for index in range(len(groups)) if demand[index][room_type]]
+        if len(wanting) < 2:
+            continue
+        given = defaultdict(int)
+        for timeslot in solver.timeslots:
+            for room in rooms:
+                cell = (timeslot.id, room.room_id)
+                owner = pinned_cells.get(cell)
+                if owner is None:
+                    owner = min(wanting, key=lambda index: given[index] / demand[index][room_type])
+                given[owner] += 1
+                for index in wanting:
+                    if index != owner:
+                        blocked[index].add(cell)
+    return blocked
+
+
+def solve_group(courses, instructors, rooms, timeslots, blocked_cells, pinned, seed, deadline=None, cohorts=()):
+    """Worker: greedy-solve one group of courses on its share of the rooms by `deadline`
+
+    Returns ([(course_id, section_id, code), ...], diagnostics) with the packed
+    (timeslot, room, instructor) codes, which match the parent solver's encoder.
+    """
+    from enhanced_csp_model import EnhancedCSPTimetable
+
+    solver = EnhancedCSPTimetable(courses, instructors, rooms, timeslots, list(cohorts))
+    solver.blocked_cells = set(blocked_cells)
+    solver.data_warnings = False
+    solver.create_variables()
+    if pinned:
+        solver.pin_assignments(pinned)
+    solver.solve_enhanced(mode="greedy", deadline=deadline, seed=seed)
+
+    encoder = solver.domain_encoder
+    placed = [(v.course_id, v.section_id, encoder.encode(*a)) for v, a in solver.assignments.items()]
+    return placed, solver.diagnostics.to_dict()
+
+
+def solve_decomposed(solver, workers=None, deadline=None):
+    """Solve independent groups of sessions in parallel and merge the results
+
+    The sessions are split into interaction components (see interaction_components),
+    packed into one group per worker, and each group gets its own share of the
+    rooms. Sessions a group could not place on its share are left for the caller's
+    repair step, which sees all rooms again. Groups still running at `deadline` (a
+    time.time() value, default the solver's) are dropped. Falls back to plain greedy
+    attempts when everything is one component.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    deadline = deadline if deadline is not None else solver.deadline
+    components = interaction_components(solver)
+    groups = group_components(components, workers)
+
+    logger.info("%d independent components (sizes: %s%s) in %d groups", len(components),
+                ", ".join(str(len(c)) for c in components[:10]), ", ..." if len(components) > 10 else "", len(groups))
+    if len(groups) < 2:
+        logger.info("Nothing to decompose - running greedy attempts instead")
+        return solver._solve_greedy(deadline)
+
+    blocked = allocate_room_cells(solver, groups)
+    by_key = {(v.course_id, v.section_id): v for v in solver.variables}
+    base_seed = solver.rng.randrange(2 ** 31)  # Group i runs with base_seed + i
+
+    # Groups stop a little before the deadline so their results arrive in time
+    group_deadline = time.time() + 0.9 * max(0.0, deadline - time.time())
+    assignments = {}
+    done = 0
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(groups)), mp_context=pool_context())
+    try:
+        futures = []
+        for index, group in enumerate(groups):
+            course_ids = {variable.course_id for variable in group}
+            courses = [course for course in solver.courses if course.course_id in course_ids]
+            pinned = [entry for entry in solver.pinned_entries if entry.get('course_id') in course_ids]
+            futures.append(executor.submit(
+                solve_group, courses, solver.instructors, solver.rooms, solver.timeslots,
+                blocked[index], pinned, base_seed + index, group_deadline, solver.cohorts))
+
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.time())):
+            placed, diagnostics = future.result()
+            done += 1
+            solver.diagnostics.merge(diagnostics)
+            for course_id, section_id, code in placed:
+                assignments[by_key[(course_id, section_id)]] = solver.domain_encoder.decode(code)
+            logger.info("Group %d/%d done: %d/%d sessions scheduled", done, len(groups), len(assignments),
+                        len(solver.variables))
+            solver._report_progress("attempt", attempt=done, max_attempts=len(groups), workers=workers)
+            solver._report_best(assignments)
+    except FuturesTimeout:
+        logger.info("Time limit reached with %d/%d groups done", done, len(groups))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return assignments
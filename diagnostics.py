@@ -0,0 +1,114 @@
+# diagnostics.py - Per-phase timers, counters and optional profiling for the solver
+import cProfile
+import functools
+import io
+import pstats
+import time
+from collections import defaultdict
+
+
+def timed(phase):
+    """Method decorator: add the call's wall time to self.diagnostics under `phase`
+
+    Timers are inclusive - a phase that calls another timed phase also counts its time.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.diagnostics.record_time(phase, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+class SolverDiagnostics:
+    """What one solve spent its time on
+
+    - timers:   phase -> total seconds, calls: phase -> number of calls
+    - counters: constraint_checks, candidates_scored, attempts, ... (summed)
+    - domains:  domain sizes at the last build / after the last propagation
+    - profile:  top functions by cumulative time, when profiling was enabled
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear everything (called at the start of each solve)"""
+        self.timers = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.domains = {}
+        self.profile = None
+        self._profiler = None
+
+    def record_time(self, phase, seconds):
+        self.timers[phase] += seconds
+        self.calls[phase] += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def start_profile(self):
+        """Start collecting a cProfile of the solve"""
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_profile(self, limit=25):
+        """Stop profiling and keep the `limit` functions with the highest cumulative time"""
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        self._profiler = None
+
+        rows = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in stats.stats.items():
+            if filename == __file__:
+                continue  # The timing wrappers would only repeat the phase they wrap
+            rows.append({
+                'function': f"{filename.rsplit('/', 1)[-1]}:{line}({name})",
+                'calls': calls,
+                'total_time': round(total, 4),
+                'cumulative_time': round(cumulative, 4),
+            })
+        rows.sort(key=lambda row: row['cumulative_time'], reverse=True)
+        self.profile = rows[:limit]
+
+    def merge(self, other, prefix="worker."):
+        """Add the timers and counters of another solve's to_dict() (e.g. a worker process)
+
+        Its phases are kept apart under `prefix`, since worker time runs alongside ours.
+        """
+        for phase, entry in other.get('phases', {}).items():
+            self.timers[prefix + phase] += entry['seconds']
+            self.calls[prefix + phase] += entry['calls']
+        for name, value in other.get('counters', {}).items():
+            self.counters[name] += value
+
+    def load(self, data):
+        """Replace everything with a previous to_dict() (e.g. of a cached solve)"""
+        self.reset()
+        for phase, entry in data.get('phases', {}).items():
+            self.timers[phase] = entry['seconds']
+            self.calls[phase] = entry['calls']
+        self.counters.update(data.get('counters', {}))
+        self.domains = dict(data.get('domains', {}))
+        self.profile = data.get('profile')
+
+    def to_dict(self):
+        """JSON-ready summary"""
+        result = {
+            'phases': {
+                phase: {'seconds': round(seconds, 4), 'calls': self.calls[phase]}
+                for phase, seconds in sorted(self.timers.items(), key=lambda item: item[1], reverse=True)
+            },
+            'counters': dict(self.counters),
+            'domains': dict(self.domains),
+        }
+        if self.profile is not None:
+            result['profile'] = self.profile
+        return result
@@ -0,0 +1,153 @@
+# domain_engine.py - Compact integer-encoded domains for the CSP solver
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+
+
+class DomainEncoder:
+    """Interns timeslots, rooms and instructors to small integer ids
+
+    A (timeslot, room, instructor) triple is packed into one integer code:
+        code = (slot * n_rooms + room) * n_instructors + instructor
+    so a whole domain fits in an array('I') instead of a list of tuples.
+    """
+
+    def __init__(self, timeslots, rooms, instructors):
+        self.timeslots = list(timeslots)
+        self.rooms = list(rooms)
+        self.instructors = list(instructors)
+
+        self.slot_index = {t.id: i for i, t in enumerate(self.timeslots)}
+        self.room_index = {r.room_id: i for i, r in enumerate(self.rooms)}
+        self.instructor_index = {ins.instructor_id: i for i, ins in enumerate(self.instructors)}
+
+        self.n_slots = len(self.timeslots)
+        self.n_rooms = len(self.rooms)
+        self.n_instructors = len(self.instructors)
+
+        # Use 32-bit codes whenever the packed space allows it
+        code_space = self.n_slots * self.n_rooms * self.n_instructors
+        self.typecode = 'I' if code_space < 2 ** 32 else 'Q'
+
+        # Occupancy masks: one byte per (slot, room) and per (slot, instructor)
+        self.slot_room_busy = bytearray(self.n_slots * self.n_rooms)
+        self.slot_instructor_busy = bytearray(self.n_slots * self.n_instructors)
+
+    def encode(self, timeslot, room, instructor):
+        """Pack a (timeslot, room, instructor) triple into an integer code"""
+        slot = self.slot_index[timeslot.id]
+        room_idx = self.room_index[room.room_id]
+        instructor_idx = self.instructor_index[instructor.instructor_id]
+        return (slot * self.n_rooms + room_idx) * self.n_instructors + instructor_idx
+
+    def unpack(self, code):
+        """Split a code into (slot, room, instructor) integer ids"""
+        rest, instructor_idx = divmod(code, self.n_instructors)
+        slot, room_idx = divmod(rest, self.n_rooms)
+        return slot, room_idx, instructor_idx
+
+    def decode(self, code):
+        """Turn a code back into a (timeslot, room, instructor) tuple"""
+        slot, room_idx, instructor_idx = self.unpack(code)
+        return (self.timeslots[slot], self.rooms[room_idx], self.instructors[instructor_idx])
+
+    def occupy(self, timeslot, room, instructor):
+        """Mark a room and an instructor as busy at a timeslot"""
+        slot = self.slot_index[timeslot.id]
+        self.slot_room_busy[slot * self.n_rooms + self.room_index[room.room_id]] = 1
+        self.slot_instructor_busy[slot * self.n_instructors + self.instructor_index[instructor.instructor_id]] = 1
+
+    def release(self, timeslot, room, instructor):
+        """Clear the busy marks set by occupy()"""
+        slot = self.slot_index[timeslot.id]
+        self.slot_room_busy[slot * self.n_rooms + self.room_index[room.room_id]] = 0
+        self.slot_instructor_busy[slot * self.n_instructors + self.instructor_index[instructor.instructor_id]] = 0
+
+    def clear(self):
+        """Reset all occupancy masks"""
+        self.slot_room_busy = bytearray(self.n_slots * self.n_rooms)
+        self.slot_instructor_busy = bytearray(self.n_slots * self.n_instructors)
+
+    def pack(self, assignments):
+        """Build a PackedDomain (sorted codes) from an iterable of (timeslot, room, instructor) tuples"""
+        return PackedDomain(self, array(self.typecode, sorted(self.encode(*a) for a in assignments)))
+
+
+class PackedDomain(Sequence):
+    """Read-only sequence of (timeslot, room, instructor) tuples backed by packed codes
+
+    Codes are kept in ascending order, so each timeslot's values form one run.
+    """
+
+    __slots__ = ('encoder', 'codes')
+
+    def __init__(self, encoder, codes):
+        self.encoder = encoder
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PackedDomain(self.encoder, self.codes[index])
+        return self.encoder.decode(self.codes[index])
+
+    def __iter__(self):
+        decode = self.encoder.decode
+        for code in self.codes:
+            yield decode(code)
+
+    def __repr__(self):
+        return f"PackedDomain({len(self.codes)} values)"
+
+    def without(self, slot, room, instructor, whole_slot=False, instructor_slots=()):
+        """Drop the values that clash with a placement of (room, instructor) at slot
+
+        All arguments are integer ids. At `slot` the values using the room or the
+        instructor go (every value with whole_slot=True); at `instructor_slots` the
+        values using the instructor go. Only those slots' runs of codes are scanned
+        (found by bisection). Returns self when nothing was dropped.
+        """
+        n_rooms = self.encoder.n_rooms
+        n_instructors = self.encoder.n_instructors
+        per_slot = n_rooms * n_instructors
+        codes = self.codes
+
+        kept = array(codes.typecode)
+        position = 0
+        for other_slot in sorted({slot, *instructor_slots}):
+            start = bisect_left(codes, other_slot * per_slot, position)
+            end = bisect_left(codes, (other_slot + 1) * per_slot, start)
+            if start == end:
+                continue
+            kept.extend(codes[position:start])
+            position = end
+            if other_slot != slot:
+                kept.extend(code for code in codes[start:end] if code % n_instructors != instructor)
+            elif not whole_slot:
+                kept.extend(code for code in codes[start:end]
+                            if code % n_instructors != instructor and code // n_instructors % n_rooms != room)
+        if position == 0:
+            return self
+        kept.extend(codes[position:])
+        return self if len(kept) == len(codes) else PackedDomain(self.encoder, kept)
+
+    def spans_one_slot(self):
+        """Whether every value uses the same timeslot (min/max over the codes, no decoding)"""
+        if not self.codes:
+            return True
+        per_slot = self.encoder.n_rooms * self.encoder.n_instructors
+        return min(self.codes) // per_slot == max(self.codes) // per_slot
+
+    def instructor_ids(self):
+        """Set of instructor_ids the values use (modulo over the codes, no decoding)"""
+        n_instructors = self.encoder.n_instructors
+        instructors = self.encoder.instructors
+        return {instructors[index].instructor_id for index in {code % n_instructors for code in self.codes}}
+
+    def filter(self, predicate):
+        """Keep only the values for which predicate(timeslot, room, instructor) is true"""
+        decode = self.encoder.decode
+        kept = array(self.codes.typecode, (code for code in self.codes if predicate(*decode(code))))
+        return PackedDomain(self.encoder, kept)
@@ -1,14 +1,52 @@
 # enhanced_csp_model.py - Enhanced CSP Timetable Generator
+import bisect
+import logging
+import math
 import time
 import random
-from collections import defaultdict
+from collections import defaultdict, deque
+from diagnostics import SolverDiagnostics, timed
+from domain_engine import DomainEncoder, PackedDomain
+from vector_scoring import HAS_NUMPY, VectorScorer
+
+logger = logging.getLogger(__name__)
+
+LECTURER_ROLES = ("Professor", "Doctor")
+TA_ROLE = "Teaching Assistant"
+
+SOLVER_MODES = ("greedy", "backtrack", "parallel", "decomposed", "exact")
+
+# Daily slot order used for the consecutive-slot soft constraint
+SLOT_ORDER = ["9:00 AM", "10:45 AM", "12:30 PM", "2:15 PM"]
+
+
+def parse_unavailable_days(value):
+    """Parse a 'Not on <Day>' value (string or list) into a frozenset of lowercase days"""
+    if isinstance(value, str):
+        value = value.split(",")
+    days = (str(v).replace("Not on", "").strip().lower() for v in (value or []))
+    return frozenset(day for day in days if day)
+
+def parse_positive_int(value):
+    """Parse an optional count (int or CSV string); empty, zero or negative -> None"""
+    if value is None or str(value).strip() == "":
+        return None
+    value = int(value)
+    return value if value > 0 else None
+
+def section_kind(section_id):
+    """'LECTURE' or 'LAB' for the parts of a 'Lecture and Lab' course, None for a regular section"""
+    kind = (section_id or "").split("-", 1)[0]
+    return kind if kind in ("LECTURE", "LAB") else None
 
 class Course:
-    def __init__(self, course_id, name, credits, type):
+    def __init__(self, course_id, name, credits, type, enrollment=None, sections=None):
         self.course_id = course_id
         self.name = name
         self.credits = credits
         self.type = type
+        self.enrollment = parse_positive_int(enrollment)  # Students taking the course (None: unknown)
+        self.sections = parse_positive_int(sections)      # Fixed section (lab section) count, None: from enrollment
 
     def __repr__(self):
         return f"Course({self.course_id}: {self.name})"
@@ -18,7 +56,9 @@ class Course:
             'course_id': self.course_id,
             'name': self.name,
             'credits': self.credits,
-            'type': self.type
+            'type': self.type,
+            'enrollment': self.enrollment,
+            'sections': self.sections
         }
 
 class Instructor:
@@ -78,18 +118,51 @@ class Timeslot:
             'id': self.id
         }
 
+class Cohort:
+    """Students who take a set of courses together (e.g. one year of a program)
+    
+    No two of those courses may hold the same timeslot.
+    """
+    def __init__(self, cohort_id, course_ids):
+        self.cohort_id = cohort_id
+        if isinstance(course_ids, str):
+            self.course_ids = [c.strip() for c in course_ids.split(",") if c.strip()]
+        else:
+            self.course_ids = list(course_ids or [])
+
+    def __repr__(self):
+        return f"Cohort({self.cohort_id}: {len(self.course_ids)} courses)"
+    
+    def to_dict(self):
+        return {
+            'cohort_id': self.cohort_id,
+            'course_ids': self.course_ids
+        }
+
 class ClassVariable:
-    """Represents a class that needs to be scheduled"""
-    def __init__(self, course_id, section_id="S1"):
+    """Represents a class that needs to be scheduled
+    
+    kind is 'LECTURE' or 'LAB' for the parts of a 'Lecture and Lab' course (section ids
+    LECTURE and LAB, or LAB-1, LAB-2... when split) and None for a regular course
+    (S1, S2...). size is the number of students in the section, when known.
+    """
+    def __init__(self, course_id, section_id="S1", size=None):
         self.course_id = course_id
         self.section_id = section_id
+        self.kind = section_kind(section_id)
+        self.size = size
         self.assignment = None
+        self._hash = hash((course_id, section_id))  # Variables are dict keys in every hot loop
     
     def __repr__(self):
         return f"Class({self.course_id}-{self.section_id})"
     
     def __hash__(self):
-        return hash((self.course_id, self.section_id))
+        return self._hash
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._hash = hash((self.course_id, self.section_id))  # String hashes differ between processes
     
     def __eq__(self, other):
         return self.course_id == other.course_id and self.section_id == other.section_id
@@ -97,46 +170,250 @@ class ClassVariable:
 class EnhancedCSPTimetable:
     """Enhanced CSP solver with improved constraints and heuristics"""
     
-    def __init__(self, courses, instructors, rooms, timeslots):
+    def __init__(self, courses, instructors, rooms, timeslots, cohorts=None):
         self.courses = courses
         self.instructors = instructors
         self.rooms = rooms
         self.timeslots = timeslots
+        self.cohorts = cohorts or []
         
         self.variables = []
         self.assignments = {}
         self.domains = {}
+        self.base_domains = {}      # Propagated domains built once per solve - attempts start from these
+        self.domain_encoder = None  # Interns entities and packs domains (see domain_engine.py)
+        self.use_numpy = HAS_NUMPY  # Score whole domains at once when NumPy is installed
+        self.vector_scorer = None
         
-        # Statistics for soft constraints
+        # Statistics for soft constraints - running counters kept in sync by assign/unassign
         self.soft_constraint_violations = 0
-        self.instructor_workload = defaultdict(int)
+        self.instructor_workload = defaultdict(int)     # instructor_id -> classes
+        self.day_load = defaultdict(int)                # day -> classes
+        self.slot_load = defaultdict(int)               # timeslot.id -> classes
+        self.room_load = defaultdict(int)               # room_id -> classes
+        self.instructor_day_slots = defaultdict(int)    # (instructor_id, day) -> bitmask of SLOT_ORDER positions
+        
+        # Occupancy indexes kept in sync with self.assignments (see assign/unassign)
+        self.room_occupancy = {}                        # (timeslot.id, room_id) -> variable
+        self.instructor_occupancy = {}                  # (timeslot.id, instructor_id) -> variable
+        self.instructor_day_load = defaultdict(int)     # (instructor_id, day) -> classes
+        self.course_slot_sections = defaultdict(set)    # (course_id, timeslot.id) -> section ids
+        self.slot_courses = defaultdict(int)            # timeslot.id -> bitset of courses placed there (see course_bit)
+        
+        # Backtracking state: variables that can never be placed, and who shares what
+        self.unschedulable = set()
+        self.fixed = set()                              # Sessions repair_unplaced() must not move
+        self.pinned = {}                                # variable -> assignment fixed before search
+        self.pinned_entries = []                        # The pins as given (see pin_assignments)
+        self.blocked_cells = set()                      # (timeslot.id, room_id) kept out of every domain
+        self.preprocessing = None                       # Report from propagate_constraints()
+        self.data_warnings = True                       # Log its data problems as WARNING (DEBUG in worker processes)
+        self.stop_event = None                          # Set by parallel_solver to cancel an attempt
+        self.deadline = None                            # time.time() by which the current solve must return
+        self.target_count = None                        # Placed sessions that count as "good enough"
+        self.target_soft_score = None                   # ... together with this soft score (lower is better)
+        self.targets_met = False                        # Whether the last solve stopped on its targets
+        self.exact_backend = None                       # Backend for mode="exact": name, ExactBackend or None (first installed)
+        self.exact_report = None                        # Status and proven bound of the last exact solve
+        self.rng = random.Random()                      # All of the solver's randomness - seeded per solve
+        self.seed = None                                # Seed of the last solve (replays it, see solve_enhanced)
+        self.improvement_report = None                  # Soft score history of the last improve_soft_score()
+        self.progress_callbacks = []                    # callback(event, data) - see add_progress_callback
+        self.progress_interval = 20                     # Sessions between 'progress' events
+        self._published_best = {}                       # Best schedule last sent in a 'delta' event
+        self.room_variables = defaultdict(list)         # room_id -> variables that may use it
+        self.instructor_variables = defaultdict(list)   # instructor_id -> variables that may use them
+        self.course_variables = defaultdict(list)       # course_id -> variables of that course
+        self.domain_entities = {}                       # variable -> (room ids, instructor ids) its domain was built from
+        self.diagnostics = SolverDiagnostics()          # Phase timers and counters of the last solve
+        
+        self.precompile()
+        
+    def add_progress_callback(self, callback):
+        """Register callback(event, data) to receive structured solver progress
+        
+        Events and their data:
+        - 'started':  mode, total
+        - 'attempt':  attempt, max_attempts (a new greedy attempt begins)
+        - 'progress': processed, scheduled, total (every progress_interval sessions)
+        - 'best':     best, total (a better schedule was found)
+        - 'delta':    added (export entries), removed ([course_id, section_id] pairs) -
+                      how the best-so-far schedule changed since the previous delta
+        - 'improved': iteration, soft_score, elapsed (neighbourhood search lowered the soft score)
+        - 'finished': scheduled, total, elapsed
+        """
+        self.progress_callbacks.append(callback)
+    
+    def remove_progress_callback(self, callback):
+        """Stop sending progress events to a callback"""
+        if callback in self.progress_callbacks:
+            self.progress_callbacks.remove(callback)
+    
+    def _report_progress(self, event, **data):
+        """Send a progress event to every registered callback"""
+        for callback in self.progress_callbacks:
+            callback(event, data)
+    
+    def _report_best(self, assignments):
+        """Send 'best' plus a 'delta' against the last best schedule sent"""
+        if not self.progress_callbacks:
+            return
+        self._report_progress("best", best=len(assignments), total=len(self.variables))
+        
+        previous = self._published_best
+        added = [self._export_entry(v, a) for v, a in assignments.items() if previous.get(v) != a]
+        removed = [[v.course_id, v.section_id] for v in previous if v not in assignments]
+        self._published_best = dict(assignments)
+        if added or removed:
+            self._report_progress("delta", added=added, removed=removed)
+    
+    @timed("precompile")
+    def precompile(self):
+        """Build the lookup tables used by the hot loops (once per solve)
+        
+        - course_by_id: course_id -> Course
+        - instructor_unavailable: instructor_id -> frozenset of lowercase days
+        - instructor_qualified: instructor_id -> frozenset of course ids
+        - course_lecturers / course_tas: course_id -> qualified Professors/Doctors or TAs
+        - rooms_by_type: room type -> list of rooms
+        - room_capacity_index: room type -> (ascending capacities, rooms in that order)
+        - slots_by_day: day -> list of timeslots
+        - slot_position: timeslot.id -> position in SLOT_ORDER (None if not a standard slot)
+        - instructor_names: instructor_id -> name
+        - course_bit: course_id -> bit position in the course bitsets
+        - course_clash_mask: course_id -> bitset of the courses sharing a cohort with it
+          (one row of the course x course clash matrix; courses without a cohort have none)
+        - cohort_courses: course_id -> course ids sharing a cohort with it
+        """
+        self.course_by_id = {course.course_id: course for course in self.courses}
+        
+        self.instructor_unavailable = {}
+        self.instructor_qualified = {}
+        self.course_lecturers = defaultdict(list)
+        self.course_tas = defaultdict(list)
+        for instructor in self.instructors:
+            self.instructor_unavailable[instructor.instructor_id] = parse_unavailable_days(instructor.unavailable_day)
+            qualified = frozenset(instructor.qualified_courses)
+            self.instructor_qualified[instructor.instructor_id] = qualified
+            for course_id in qualified:
+                if instructor.role == TA_ROLE:
+                    self.course_tas[course_id].append(instructor)
+                elif instructor.role in LECTURER_ROLES:
+                    self.course_lecturers[course_id].append(instructor)
+        
+        self.rooms_by_type = defaultdict(list)
+        for room in self.rooms:
+            self.rooms_by_type[room.type].append(room)
+        # Rooms that seat n students are a suffix of the capacity-sorted list (see rooms_for)
+        self.room_capacity_index = {}
+        for room_type, rooms in self.rooms_by_type.items():
+            by_capacity = sorted(rooms, key=lambda room: room.capacity)
+            self.room_capacity_index[room_type] = ([room.capacity for room in by_capacity], by_capacity)
+        
+        self.slots_by_day = defaultdict(list)
+        self.slot_position = {}
+        for timeslot in self.timeslots:
+            self.slots_by_day[timeslot.day].append(timeslot)
+            self.slot_position[timeslot.id] = SLOT_ORDER.index(timeslot.start_time) if timeslot.start_time in SLOT_ORDER else None
+        
+        self.instructor_names = {instructor.instructor_id: instructor.name for instructor in self.instructors}
         
+        self.course_bit = {course.course_id: index for index, course in enumerate(self.courses)}
+        self.course_clash_mask = {}
+        for cohort in self.cohorts:
+            members = [course_id for course_id in cohort.course_ids if course_id in self.course_bit]
+            bits = 0
+            for course_id in members:
+                bits |= 1 << self.course_bit[course_id]
+            for course_id in members:
+                others = bits & ~(1 << self.course_bit[course_id])
+                if others:
+                    self.course_clash_mask[course_id] = self.course_clash_mask.get(course_id, 0) | others
+        self.cohort_courses = {
+            course_id: [other.course_id for other in self.courses if mask >> self.course_bit[other.course_id] & 1]
+            for course_id, mask in self.course_clash_mask.items()
+        }
+    
+    def required_room_type(self, variable, course=None):
+        """Room type a session needs, based on its SECTION type (not just course type)"""
+        if variable.kind == "LAB":
+            # This is the LAB portion of a "Lecture and Lab" course
+            return "Lab"
+        if variable.kind == "LECTURE":
+            # This is the LECTURE portion of a "Lecture and Lab" course
+            return "Lecture"
+        course = course or self.course_by_id.get(variable.course_id)
+        # Regular lab-only or lecture-only course
+        return "Lab" if course and "Lab" in course.type else "Lecture"
+    
+    def rooms_for(self, variable, course=None):
+        """Rooms of the section's type that seat all of its students
+        
+        A binary search in the capacity index, so large multi-section catalogs never scan
+        every room. Sections of unknown size can use any room of the type.
+        """
+        room_type = self.required_room_type(variable, course)
+        if variable.size is None:
+            return self.rooms_by_type.get(room_type, [])
+        capacities, rooms = self.room_capacity_index.get(room_type, ([], []))
+        return rooms[bisect.bisect_left(capacities, variable.size):]
+    
+    def section_sizes(self, course, room_type, count=None):
+        """Student counts of a course's sections held in rooms of room_type
+        
+        `count` sections if given, otherwise as few as the largest room of the type
+        allows. Enrollment is split evenly. Unknown enrollment: one section of unknown size.
+        """
+        enrollment = course.enrollment
+        if count is None:
+            capacities = self.room_capacity_index.get(room_type, ([], []))[0]
+            if not enrollment or not capacities or not capacities[-1]:
+                return [None]
+            count = math.ceil(enrollment / capacities[-1])
+        if not enrollment:
+            return [None] * count
+        return [enrollment // count + (1 if i < enrollment % count else 0) for i in range(count)]
+    
+    def _course_sections(self, course, prefix, room_type, count=None):
+        """ClassVariables for the sections of one course part (S1, S2... or LAB, LAB-1, LAB-2...)"""
+        sizes = self.section_sizes(course, room_type, count)
+        if prefix == "S":
+            section_ids = [f"S{i + 1}" for i in range(len(sizes))]
+        elif len(sizes) == 1:
+            section_ids = [prefix]
+        else:
+            section_ids = [f"{prefix}-{i + 1}" for i in range(len(sizes))]
+        return [ClassVariable(course.course_id, section_id, size) for section_id, size in zip(section_ids, sizes)]
+    
     def create_variables(self):
         """Create variables for all courses that need to be scheduled
         
         IMPORTANT: Courses with type 'Lecture and Lab' need TWO separate sessions:
         - One lecture session (in a lecture hall)
         - One lab session (in a lab room)
+        
+        With an enrollment, a course is split into as many sections as its rooms need
+        (course.sections fixes the count - of the lab sections for 'Lecture and Lab').
         """
-        print("Creating variables (classes to schedule)...")
+        logger.debug("Creating variables (classes to schedule)")
         
         self.variables = []
         for course in self.courses:
             if "and" in course.type.lower():
                 # Course needs BOTH lecture and lab sessions
-                lecture_var = ClassVariable(course.course_id, section_id="LECTURE")
-                lab_var = ClassVariable(course.course_id, section_id="LAB")
-                self.variables.append(lecture_var)
-                self.variables.append(lab_var)
-                print(f"  {course.course_id}: Created 2 sessions (Lecture + Lab)")
+                lectures = self._course_sections(course, "LECTURE", "Lecture")
+                labs = self._course_sections(course, "LAB", "Lab", course.sections)
+                self.variables.extend(lectures + labs)
+                logger.debug("  %s: created %d lecture + %d lab sessions", course.course_id, len(lectures), len(labs))
             else:
-                # Regular course - only one session
-                var = ClassVariable(course.course_id, section_id="S1")
-                self.variables.append(var)
+                # Regular course - one session per section
+                room_type = "Lab" if "Lab" in course.type else "Lecture"
+                self.variables.extend(self._course_sections(course, "S", room_type, course.sections))
             
-        print(f"Created {len(self.variables)} variables to schedule (includes split Lecture+Lab courses)")
+        logger.debug("Created %d variables to schedule (includes split Lecture+Lab courses)", len(self.variables))
         return self.variables
     
+    @timed("create_domains")
     def create_domains(self):
         """Create initial domains for all variables with enhanced filtering
         
@@ -144,141 +421,323 @@ class EnhancedCSPTimetable:
         - LECTURE sections must use Lecture halls
         - LAB sections must use Lab rooms
         """
-        print("Creating domains for each variable...")
+        logger.debug("Creating domains for each variable")
+        
+        if self.domain_encoder is None:
+            self.domain_encoder = DomainEncoder(self.timeslots, self.rooms, self.instructors)
+        if self.use_numpy and self.vector_scorer is None:
+            self.vector_scorer = VectorScorer(self)
         
         for variable in self.variables:
-            course = next((c for c in self.courses if c.course_id == variable.course_id), None)
+            course = self.course_by_id.get(variable.course_id)
             if not course:
                 continue
+            
+            # Pinned sessions have exactly one value
+            if variable in self.pinned:
+                timeslot, room, instructor = self.pinned[variable]
+                self.domains[variable] = self.domain_encoder.pack([self.pinned[variable]])
+                self.domain_entities[variable] = ({room.room_id}, {instructor.instructor_id})
+                continue
                 
             # Find qualified instructors based on SECTION TYPE and ROLE
-            if variable.section_id == "LAB":
+            if variable.kind == "LAB":
                 # LAB sections can ONLY be taught by Teaching Assistants
-                qualified_instructors = [
-                    instr for instr in self.instructors 
-                    if variable.course_id in instr.qualified_courses 
-                    and instr.role == "Teaching Assistant"
-                ]
-                print(f"  {variable.course_id}-LAB: {len(qualified_instructors)} qualified TAs")
+                qualified_instructors = self.course_tas.get(variable.course_id, [])
             else:
                 # LECTURE sections can ONLY be taught by Professors or Doctors
-                qualified_instructors = [
-                    instr for instr in self.instructors 
-                    if variable.course_id in instr.qualified_courses 
-                    and (instr.role == "Professor" or instr.role == "Doctor")
-                ]
-                section_label = variable.section_id if variable.section_id else "LECTURE"
-                print(f"  {variable.course_id}-{section_label}: {len(qualified_instructors)} qualified Professors/Doctors")
-            
-            # Find suitable rooms based on VARIABLE SECTION TYPE (not just course type)
-            if variable.section_id == "LAB":
-                # This is the LAB portion of a "Lecture and Lab" course
-                suitable_rooms = [room for room in self.rooms if room.type == "Lab"]
-            elif variable.section_id == "LECTURE":
-                # This is the LECTURE portion of a "Lecture and Lab" course
-                suitable_rooms = [room for room in self.rooms if room.type == "Lecture"]
-            elif "Lab" in course.type:
-                # Regular lab-only course
-                suitable_rooms = [room for room in self.rooms if room.type == "Lab"]
-            else:
-                # Regular lecture-only course
-                suitable_rooms = [room for room in self.rooms if room.type == "Lecture"]
+                qualified_instructors = self.course_lecturers.get(variable.course_id, [])
             
-            # Build domain
-            domain = []
-            for timeslot in self.timeslots:
-                for room in suitable_rooms:
-                    for instructor in qualified_instructors:
-                        # Pre-filter obviously invalid assignments
-                        if self._is_instructor_available(instructor, timeslot):
-                            domain.append((timeslot, room, instructor))
+            # Find suitable rooms based on VARIABLE SECTION TYPE (not just course type) and size
+            suitable_rooms = self.rooms_for(variable, course)
+            self.domain_entities[variable] = ({room.room_id for room in suitable_rooms},
+                                              {instructor.instructor_id for instructor in qualified_instructors})
             
-            self.domains[variable] = domain
+            # Build domain as packed integer codes (pre-filter obviously invalid assignments)
+            self.domains[variable] = self.domain_encoder.pack(
+                (timeslot, room, instructor)
+                for timeslot in self.timeslots
+                for room in suitable_rooms
+                for instructor in qualified_instructors
+                if self._is_instructor_available(instructor, timeslot)
+                and (timeslot.id, room.room_id) not in self.blocked_cells
+            )
             
         # Print summary
         total_domain_size = sum(len(self.domains.get(var, [])) for var in self.variables)
+        self.diagnostics.domains['initial_values'] = total_domain_size
         avg_domain_size = total_domain_size / len(self.variables) if self.variables else 0
-        print(f"Average domain size: {avg_domain_size:.1f} assignments per variable")
+        logger.debug("Average domain size: %.1f assignments per variable", avg_domain_size)
             
         return self.domains
     
+    def assign(self, variable, assignment):
+        """Record an assignment and update the occupancy indexes"""
+        timeslot, room, instructor = assignment
+        self.assignments[variable] = assignment
+        variable.assignment = assignment
+        self.room_occupancy[(timeslot.id, room.room_id)] = variable
+        self.instructor_occupancy[(timeslot.id, instructor.instructor_id)] = variable
+        self.instructor_day_load[(instructor.instructor_id, timeslot.day)] += 1
+        self.course_slot_sections[(variable.course_id, timeslot.id)].add(variable.section_id)
+        self.slot_courses[timeslot.id] |= 1 << self.course_bit[variable.course_id]
+        if self.domain_encoder is not None:
+            self.domain_encoder.occupy(timeslot, room, instructor)
+        
+        self.day_load[timeslot.day] += 1
+        self.slot_load[timeslot.id] += 1
+        self.room_load[room.room_id] += 1
+        self.instructor_workload[instructor.instructor_id] += 1
+        position = self.slot_position.get(timeslot.id)
+        if position is not None:
+            self.instructor_day_slots[(instructor.instructor_id, timeslot.day)] |= 1 << position
+    
+    def unassign(self, variable):
+        """Undo an assignment and update the occupancy indexes"""
+        timeslot, room, instructor = self.assignments.pop(variable)
+        variable.assignment = None
+        if self.domain_encoder is not None:
+            self.domain_encoder.release(timeslot, room, instructor)
+        del self.room_occupancy[(timeslot.id, room.room_id)]
+        del self.instructor_occupancy[(timeslot.id, instructor.instructor_id)]
+        
+        load_key = (instructor.instructor_id, timeslot.day)
+        self.instructor_day_load[load_key] -= 1
+        if not self.instructor_day_load[load_key]:
+            del self.instructor_day_load[load_key]
+        
+        sections = self.course_slot_sections[(variable.course_id, timeslot.id)]
+        sections.discard(variable.section_id)
+        if not sections:
+            del self.course_slot_sections[(variable.course_id, timeslot.id)]
+            self.slot_courses[timeslot.id] &= ~(1 << self.course_bit[variable.course_id])
+        
+        for counter, key in ((self.day_load, timeslot.day), (self.slot_load, timeslot.id),
+                             (self.room_load, room.room_id), (self.instructor_workload, instructor.instructor_id)):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+        position = self.slot_position.get(timeslot.id)
+        if position is not None:
+            self.instructor_day_slots[(instructor.instructor_id, timeslot.day)] &= ~(1 << position)
+    
+    def reset_assignments(self, assignments=None):
+        """Replace all assignments at once and rebuild the occupancy indexes"""
+        for variable in self.assignments:
+            variable.assignment = None
+        self.assignments = {}
+        self.room_occupancy = {}
+        self.instructor_occupancy = {}
+        self.instructor_day_load = defaultdict(int)
+        self.course_slot_sections = defaultdict(set)
+        self.slot_courses = defaultdict(int)
+        self.instructor_workload = defaultdict(int)
+        self.day_load = defaultdict(int)
+        self.slot_load = defaultdict(int)
+        self.room_load = defaultdict(int)
+        self.instructor_day_slots = defaultdict(int)
+        if self.domain_encoder is not None:
+            self.domain_encoder.clear()
+        for variable, assignment in (assignments or {}).items():
+            self.assign(variable, assignment)
+    
+    def _schedule_assignments(self, schedule):
+        """Map export_to_dict()['schedule'] entries onto this solver's variables and entities
+        
+        Entries whose session, timeslot, room or instructor no longer exists are skipped.
+        """
+        if not self.variables:
+            self.create_variables()
+        by_key = {(v.course_id, v.section_id): v for v in self.variables}
+        timeslots = {(t.day, t.start_time): t for t in self.timeslots}
+        rooms = {r.room_id: r for r in self.rooms}
+        instructors = {i.instructor_id: i for i in self.instructors}
+        
+        assignments = {}
+        for entry in schedule:
+            variable = by_key.get((entry.get('course_id'), entry.get('section_id', 'S1')))
+            timeslot = timeslots.get((entry.get('day'), entry.get('start_time')))
+            room = rooms.get(entry.get('room_id'))
+            instructor = instructors.get(entry.get('instructor_id'))
+            if variable and timeslot and room and instructor:
+                assignments[variable] = (timeslot, room, instructor)
+        return assignments
+    
+    def pin_assignments(self, entries):
+        """Fix sessions to a given timeslot, room and instructor before search
+        
+        Entries use the export_to_dict() schedule format (course_id, section_id, day,
+        start_time, room_id, instructor_id; section_id defaults to 'S1'). Pinned
+        sessions get a single-value domain, are placed before every attempt and are
+        never moved by repair. Raises ValueError if a pin refers to unknown data or
+        breaks a hard constraint (alone or together with another pin), is malformed
+        or pins the same session twice.
+        """
+        self.precompile()
+        if not isinstance(entries, (list, tuple)) and entries is not None:
+            raise ValueError("Invalid pinned assignments: expected a list of sessions")
+        entries = list(entries or [])
+        label = lambda entry: f"{entry.get('course_id')}-{entry.get('section_id', 'S1')}"
+        
+        # Check the shape first: _schedule_assignments expects one dict per session
+        errors = []
+        sessions = set()
+        for number, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict):
+                errors.append(f"pin {number}: expected an object, got {type(entry).__name__}")
+                continue
+            missing = [field for field in ('course_id', 'day', 'start_time', 'room_id', 'instructor_id')
+                       if entry.get(field) is None]
+            if missing:
+                errors.append(f"pin {number}: missing {', '.join(missing)}")
+            session = (entry.get('course_id'), entry.get('section_id', 'S1'))
+            if session in sessions:
+                errors.append(f"{label(entry)}: pinned more than once")
+            sessions.add(session)
+        if errors:
+            raise ValueError("Invalid pinned assignments: " + "; ".join(errors))
+        
+        resolved = self._schedule_assignments(entries)
+        resolved_keys = {(v.course_id, v.section_id) for v in resolved}
+        
+        errors = [f"{label(entry)}: unknown session, timeslot, room or instructor"
+                  for entry in entries if (entry.get('course_id'), entry.get('section_id', 'S1')) not in resolved_keys]
+        
+        # Place the pins one by one so clashes between pins are caught too
+        self.reset_assignments()
+        for variable, (timeslot, room, instructor) in resolved.items():
+            if self.is_assignment_valid(variable, timeslot, room, instructor):
+                self.assign(variable, (timeslot, room, instructor))
+            else:
+                errors.append(f"{variable.course_id}-{variable.section_id}: violates a hard constraint")
+        self.reset_assignments()
+        
+        if errors:
+            raise ValueError("Invalid pinned assignments: " + "; ".join(errors))
+        self.pinned = resolved
+        self.pinned_entries = entries
+        logger.info("%d pinned sessions", len(self.pinned))
+        return len(self.pinned)
+    
+    def load_schedule(self, schedule, preprocessing=None):
+        """Restore assignments from export_to_dict()['schedule'] entries
+        
+        Returns the number of sessions restored.
+        """
+        assignments = self._schedule_assignments(schedule)
+        self.reset_assignments(assignments)
+        if preprocessing is not None:
+            self.preprocessing = preprocessing
+        return len(assignments)
+    
+    def load_result(self, result):
+        """Restore a whole export_to_dict() result: the schedule and the seed, targets,
+        reports and diagnostics of the solve that produced it
+        
+        Returns the number of sessions restored.
+        """
+        restored = self.load_schedule(result['schedule'], result.get('preprocessing'))
+        targets = result.get('targets') or {}
+        self.target_count = targets.get('placed')
+        self.target_soft_score = targets.get('soft_score')
+        self.targets_met = bool(targets.get('met'))
+        self.exact_report = result.get('exact')
+        self.improvement_report = result.get('improvement')
+        self.seed = result.get('seed')
+        self.diagnostics.load(result.get('diagnostics') or {})
+        return restored
+    
     def _is_instructor_available(self, instructor, timeslot):
         """Check if instructor is available at this timeslot"""
-        unavailable_day = instructor.unavailable_day.replace("Not on", "").strip()
-        return timeslot.day.lower() != unavailable_day.lower()
+        return timeslot.day.lower() not in self.instructor_unavailable.get(instructor.instructor_id, ())
     
     def is_assignment_valid(self, variable, timeslot, room, instructor):
         """Check if an assignment violates any HARD constraints"""
-        course = next((c for c in self.courses if c.course_id == variable.course_id), None)
+        self.diagnostics.counters['constraint_checks'] += 1
+        course = self.course_by_id.get(variable.course_id)
         if not course:
             return False
         
         # HARD CONSTRAINT 1: Room type must match the SECTION type (not just course type)
-        if variable.section_id == "LAB":
-            # LAB section of "Lecture and Lab" course - must be in a lab
-            if room.type != "Lab":
-                return False
-        elif variable.section_id == "LECTURE":
-            # LECTURE section of "Lecture and Lab" course - must be in lecture hall
-            if room.type != "Lecture":
-                return False
-        elif "Lab" in course.type:
-            # Regular lab-only course
-            if room.type != "Lab":
-                return False
-        else:
-            # Regular lecture-only course
-            if room.type != "Lecture":
-                return False
+        if room.type != self.required_room_type(variable, course):
+            return False
+        
+        # HARD CONSTRAINT 1.5: The room must seat the whole section (when its size is known)
+        if variable.size is not None and room.capacity < variable.size:
+            return False
         
         # HARD CONSTRAINT 2: Instructor cannot teach on their unavailable day
         if not self._is_instructor_available(instructor, timeslot):
             return False
         
         # HARD CONSTRAINT 3: Instructor must be qualified for the course
-        if variable.course_id not in instructor.qualified_courses:
+        if variable.course_id not in self.instructor_qualified.get(instructor.instructor_id, ()):
             return False
         
         # HARD CONSTRAINT 3.5: Instructor ROLE must match SECTION type (CRITICAL!)
-        if variable.section_id == "LAB":
+        if variable.kind == "LAB":
             # LAB sections can ONLY be taught by Teaching Assistants
-            if instructor.role != "Teaching Assistant":
+            if instructor.role != TA_ROLE:
                 return False
-        elif variable.section_id == "LECTURE" or not variable.section_id:
+        elif variable.kind == "LECTURE" or not variable.section_id:
             # LECTURE sections can ONLY be taught by Professors or Doctors
-            if instructor.role not in ["Professor", "Doctor"]:
+            if instructor.role not in LECTURER_ROLES:
                 return False
             
         # HARD CONSTRAINT 4: No room double-booking
-        for other_var, other_assignment in self.assignments.items():
-            if other_assignment[0].id == timeslot.id and other_assignment[1].room_id == room.room_id:
-                return False
+        if (timeslot.id, room.room_id) in self.room_occupancy:
+            return False
                 
         # HARD CONSTRAINT 5: No instructor double-booking
-        for other_var, other_assignment in self.assignments.items():
-            if other_assignment[0].id == timeslot.id and other_assignment[2].instructor_id == instructor.instructor_id:
-                return False
+        if (timeslot.id, instructor.instructor_id) in self.instructor_occupancy:
+            return False
         
         # HARD CONSTRAINT 6: Instructor workload limit (max 4 classes per day)
-        day_workload = sum(1 for other_var, other_assignment in self.assignments.items() 
-                          if other_assignment[0].day == timeslot.day 
-                          and other_assignment[2].instructor_id == instructor.instructor_id)
-        if day_workload >= 4:
+        if self.instructor_day_load.get((instructor.instructor_id, timeslot.day), 0) >= 4:
             return False
         
         # HARD CONSTRAINT 7: Lecture and Lab sections of same course must be at DIFFERENT times
         # (Students can't attend both at the same time!)
-        for other_var, other_assignment in self.assignments.items():
-            if (variable.course_id == other_var.course_id and 
-                variable.section_id != other_var.section_id and
-                other_assignment[0].id == timeslot.id):
-                # Same course, different sections (LECTURE vs LAB), same timeslot = CONFLICT!
-                return False
+        if self.course_slot_clash(variable, timeslot):
+            # Same course, different sections (LECTURE vs LAB), same timeslot = CONFLICT!
+            return False
+        
+        # HARD CONSTRAINT 8: Courses taken by the same cohort must be at DIFFERENT times
+        if self.cohort_clash(variable, timeslot):
+            return False
                 
         return True
     
+    def course_slot_clash(self, variable, timeslot):
+        """Whether a placed section of the other kind (lecture vs lab) of the course holds this slot
+        
+        Parallel sections of one kind split the students, so they may share a timeslot.
+        """
+        sections = self.course_slot_sections.get((variable.course_id, timeslot.id))
+        return bool(sections) and any(section_kind(section) != variable.kind for section in sections)
+    
+    def cohort_clash(self, variable, timeslot):
+        """Whether a course sharing a cohort with this one holds the slot - one AND of two bitsets"""
+        return bool(self.course_clash_mask.get(variable.course_id, 0) & self.slot_courses.get(timeslot.id, 0))
+    
+    def sessions_clash(self, variable, other):
+        """Whether two sessions may never share a timeslot (lecture vs lab of one course, or one cohort)"""
+        if variable.course_id == other.course_id:
+            return variable.kind != other.kind
+        return bool(self.course_clash_mask.get(variable.course_id, 0) >> self.course_bit[other.course_id] & 1)
+    
+    def slot_neighbours(self, course_id):
+        """Sessions of the course and of every course sharing a cohort with it"""
+        found = list(self.course_variables.get(course_id, ()))
+        for other_id in self.cohort_courses.get(course_id, ()):
+            found.extend(self.course_variables.get(other_id, ()))
+        return found
+    
     def calculate_soft_constraint_score(self, variable, timeslot, room, instructor):
-        """Calculate a score based on soft constraints (lower is better)"""
+        """Calculate a score based on soft constraints (lower is better)
+        
+        Every term is read from the running counters, so scoring a candidate is O(1).
+        """
         score = 0
         
         # SOFT CONSTRAINT 1: Very light penalty for early/late slots (don't avoid them too much)
@@ -288,44 +747,61 @@ class EnhancedCSPTimetable:
             score += 0.5  # Very small penalty for late afternoon
         
         # SOFT CONSTRAINT 2: Balance day distribution (but less aggressive)
-        day_count = sum(1 for ass in self.assignments.values() if ass[0].day == timeslot.day)
-        score += day_count * 0.5  # Reduced penalty - still balance but don't avoid days
+        score += self.day_load.get(timeslot.day, 0) * 0.5  # Reduced penalty - still balance but don't avoid days
         
         # SOFT CONSTRAINT 3: Instructor workload balance
-        instructor_count = sum(1 for ass in self.assignments.values() 
-                              if ass[2].instructor_id == instructor.instructor_id)
-        score += instructor_count * 0.3  # Prefer instructors with fewer classes
+        score += self.instructor_workload.get(instructor.instructor_id, 0) * 0.3  # Prefer instructors with fewer classes
         
         # SOFT CONSTRAINT 4: Prefer larger rooms for lecture courses
-        course = next((c for c in self.courses if c.course_id == variable.course_id), None)
+        course = self.course_by_id.get(variable.course_id)
         if course and "Lab" not in course.type and room.capacity < 50:
             score += 1
         
         # SOFT CONSTRAINT 5: Bonus for consecutive slots (reduces gaps)
-        consecutive_bonus = 0
-        for other_var, other_assignment in self.assignments.items():
-            if other_assignment[2].instructor_id == instructor.instructor_id:
-                if other_assignment[0].day == timeslot.day:
-                    # Check if it's the same timeslot or adjacent
-                    if self._are_timeslots_consecutive(timeslot, other_assignment[0]):
-                        consecutive_bonus -= 2  # Bonus for consecutive slots (reduces gaps)
-        score += consecutive_bonus
+        position = self.slot_position.get(timeslot.id)
+        if position is not None:
+            busy = self.instructor_day_slots.get((instructor.instructor_id, timeslot.day), 0)
+            neighbours = busy & ((1 << (position + 1)) | (1 << position >> 1))
+            score -= 2 * bin(neighbours).count("1")  # Bonus for consecutive slots (reduces gaps)
         
         # Add randomness to explore more possibilities
-        score += random.uniform(-0.5, 0.5)
+        score += self.rng.uniform(-0.5, 0.5)
         
         return score
     
+    def schedule_soft_score(self):
+        """Soft-constraint score of the whole timetable (lower is better, no random noise)
+        
+        Equals the sum of calculate_soft_constraint_score() terms collected while placing
+        the sessions one by one, in any order - so it only depends on the final timetable.
+        """
+        score = 0.0
+        for variable, (timeslot, room, instructor) in self.assignments.items():
+            # SOFT CONSTRAINT 1: early/late slots
+            if timeslot.start_time in ("9:00 AM", "2:15 PM"):
+                score += 0.5
+            # SOFT CONSTRAINT 4: small rooms for lecture courses
+            course = self.course_by_id.get(variable.course_id)
+            if course and "Lab" not in course.type and room.capacity < 50:
+                score += 1
+        
+        # SOFT CONSTRAINTS 2-3: the k-th class on a day / of an instructor costs (k-1) * weight
+        score += sum(0.5 * n * (n - 1) / 2 for n in self.day_load.values())
+        score += sum(0.3 * n * (n - 1) / 2 for n in self.instructor_workload.values())
+        
+        # SOFT CONSTRAINT 5: bonus for every pair of back-to-back classes
+        score -= 2 * sum(bin(mask & (mask >> 1)).count("1") for mask in self.instructor_day_slots.values())
+        return round(score, 2)
+    
     def _are_timeslots_consecutive(self, slot1, slot2):
         """Check if two timeslots are consecutive"""
-        time_order = ["9:00 AM", "10:45 AM", "12:30 PM", "2:15 PM"]
         if slot1.day != slot2.day:
             return False
         try:
-            idx1 = time_order.index(slot1.start_time)
-            idx2 = time_order.index(slot2.start_time)
+            idx1 = SLOT_ORDER.index(slot1.start_time)
+            idx2 = SLOT_ORDER.index(slot2.start_time)
             return abs(idx1 - idx2) == 1
-        except:
+        except ValueError:
             return False
     
     def select_unassigned_variable(self):
@@ -337,18 +813,27 @@ class EnhancedCSPTimetable:
         # MRV: Choose variable with smallest domain
         return min(unassigned, key=lambda v: len(self.domains.get(v, [])))
     
-    def order_domain_values(self, variable):
-        """Order domain values using soft constraint scores - OPTIMIZED for speed"""
+    @timed("order_domain_values")
+    def order_domain_values(self, variable, sample_size=100):
+        """Order domain values using soft constraint scores - OPTIMIZED for speed
+        
+        Pass sample_size=None to score the whole domain (complete search needs every value).
+        """
         domain = self.domains.get(variable, [])
         
         if not domain:
             return []
         
+        # With NumPy: score the FULL domain in one batch and keep the best sample_size values
+        if self.vector_scorer is not None and isinstance(domain, PackedDomain):
+            self.diagnostics.counters['candidates_scored'] += len(domain)
+            return self.vector_scorer.order(variable, domain, top_k=sample_size)
+        
         # For speed: limit scoring to first 100 options (usually enough)
-        if len(domain) > 100:
+        if sample_size is not None and len(domain) > sample_size:
             # Randomly sample to ensure variety
-            random.shuffle(domain)
-            domain = domain[:100]
+            domain = self.rng.sample(domain, sample_size)
+        self.diagnostics.counters['candidates_scored'] += len(domain)
         
         # Score each assignment
         scored_assignments = []
@@ -363,100 +848,221 @@ class EnhancedCSPTimetable:
         # Return ordered assignments
         return [assignment for score, assignment in scored_assignments]
     
-    def forward_check(self):
-        """Perform forward checking to reduce domains"""
-        for variable in self.variables:
-            if variable not in self.assignments:
-                self.domains[variable] = [
-                    ass for ass in self.domains.get(variable, [])
-                    if self.is_assignment_valid(variable, ass[0], ass[1], ass[2])
-                ]
-                if not self.domains[variable]:
-                    return False
-        return True
-    
-    def solve_enhanced(self, timeout_seconds=60):
-        """Enhanced solver using FAST GREEDY algorithm with constraint satisfaction"""
-        print("\n" + "="*80)
-        print("🚀 FAST GREEDY CSP SOLVER - Starting...")
-        print("="*80)
+    def solve_enhanced(self, timeout_seconds=60, mode="greedy", workers=None, repair=True, profile=False,
+                       deadline=None, target_rate=1.0, target_soft_score=None, backend=None, improve=False,
+                       seed=None):
+        """Enhanced solver using FAST GREEDY algorithm with constraint satisfaction
+        
+        mode="greedy" runs randomized greedy attempts; mode="backtrack" runs a complete
+        search that either places every schedulable session or runs out of time;
+        mode="parallel" runs greedy attempts on `workers` processes (default: all cores);
+        mode="decomposed" solves independent groups of sessions on `workers` processes;
+        mode="exact" solves a 0/1 model with an exact backend (see exact_solver.py; `backend`
+        defaults to self.exact_backend) and reports a proven upper bound in self.exact_report.
+        With repair=True, sessions the greedy modes leave out go through repair_unplaced()
+        (in exact mode, unless the exact result is proven optimal).
+        With improve=True, the finished timetable goes through improve_soft_score() until
+        the deadline (repair then only gets half of what construction leaves).
+        With profile=True a cProfile summary is added to the diagnostics.
+        
+        All randomness comes from self.rng, seeded with `seed` (a fresh one is drawn when
+        None and kept in self.seed). Parallel attempts and decomposition groups get seeds
+        derived from it. The same seed replays the same solve as long as it stops on its
+        targets or on the same number of attempts - a deadline cuts the work wherever
+        the clock says.
+        
+        The solve is anytime: it returns by `deadline` (a time.time() value, default
+        timeout_seconds from now) with the best timetable found so far. Construction and
+        restarts get the first half of the budget, repair the rest. It stops early once
+        the targets are met: target_rate of the sessions placed (capped by the
+        preprocessing upper bound) and, if given, a schedule_soft_score() of at most
+        target_soft_score.
+        """
+        if mode not in SOLVER_MODES:
+            raise ValueError(f"Unknown solver mode '{mode}' (expected one of {', '.join(SOLVER_MODES)})")
+        
+        self.diagnostics.reset()
+        if profile:
+            self.diagnostics.start_profile()
+        
+        titles = {"greedy": "fast greedy", "backtrack": "backtracking", "parallel": "parallel greedy",
+                  "decomposed": "decomposed", "exact": "exact"}
+        logger.info("Starting %s CSP solver", titles[mode])
         
         start_time = time.time()
+        self.deadline = deadline if deadline is not None else start_time + timeout_seconds
+        self.targets_met = False
+        self.exact_report = None
+        self.improvement_report = None
+        self.seed = seed if seed is not None else random.randrange(2 ** 31)
+        self.rng.seed(self.seed)
+        logger.debug("Random seed %d", self.seed)
+        
+        # Lookup tables are rebuilt once per solve (data may have been edited since __init__)
+        self.precompile()
+        self.fixed = set(self.pinned)
         
         if not self.variables:
             self.create_variables()
-        if not self.domains:
-            self.create_domains()
+        # Domains only depend on the data, so they're built (and propagated below) once per solve
+        self.create_domains()
         
         self.start_time = start_time
-        self.timeout_seconds = timeout_seconds
         
-        print(f"\n📊 Problem Size:")
-        print(f"   - Sessions to schedule: {len(self.variables)}")
-        print(f"   - Instructors: {len(self.instructors)}")
-        print(f"   - Rooms: {len(self.rooms)}")
-        print(f"   - Timeslots: {len(self.timeslots)}")
+        logger.debug("Problem size: %d sessions, %d instructors, %d rooms, %d timeslots",
+                     len(self.variables), len(self.instructors), len(self.rooms), len(self.timeslots))
+        self._published_best = {}
+        self._report_progress("started", mode=mode, total=len(self.variables))
+        
+        # Arc consistency + capacity checks: early "cannot be scheduled" answers
+        self.propagate_constraints()
+        self.base_domains = dict(self.domains)
+        self.target_count = min(math.ceil(target_rate * len(self.variables)), self.preprocessing['max_schedulable'])
+        self.target_soft_score = target_soft_score
         
+        # Construction and restarts may use half of the remaining budget, repair gets the rest.
+        # An exact backend may use all of it; repair only takes over what it leaves unproven.
+        use_repair = repair and mode != "backtrack"
+        if use_repair and mode != "exact":
+            construction_deadline = time.time() + max(0.0, self.deadline - time.time()) / 2
+        else:
+            construction_deadline = self.deadline
+        
+        search_start = time.perf_counter()
+        if mode == "backtrack":
+            best_assignments = self._solve_backtrack()
+        elif mode == "parallel":
+            from parallel_solver import solve_parallel
+            best_assignments = solve_parallel(self, workers=workers, deadline=construction_deadline)
+        elif mode == "decomposed":
+            from decomposition import solve_decomposed
+            best_assignments = solve_decomposed(self, workers=workers, deadline=construction_deadline)
+        elif mode == "exact":
+            from exact_solver import solve_exact
+            best_assignments = solve_exact(self, backend if backend is not None else self.exact_backend,
+                                           workers=workers, deadline=construction_deadline)
+            use_repair = use_repair and self.exact_report['status'] != "optimal"
+        else:
+            best_assignments = self._solve_greedy(construction_deadline)
+        self.diagnostics.record_time("search", time.perf_counter() - search_start)
+        
+        # Use the best assignments found
+        self.reset_assignments(best_assignments)
+        self.targets_met = self._targets_met()
+        
+        # Local-search repair of the sessions greedy construction skipped
+        if use_repair and len(self.assignments) < self.target_count:
+            repair_time = max(0.0, self.deadline - time.time())
+            self.repair_unplaced(time_limit=repair_time / 2 if improve else repair_time, goal=self.target_count)
+            self.targets_met = self._targets_met()
+        
+        # Large neighbourhood search on the soft score with whatever time is left
+        if improve and self.assignments:
+            self.improve_soft_score(time_limit=max(0.0, self.deadline - time.time()))
+            self.targets_met = self._targets_met()
+        
+        end_time = time.time()
+        elapsed = end_time - start_time
+        self.diagnostics.record_time("total", elapsed)
+        if profile:
+            self.diagnostics.stop_profile()
+        
+        logger.info("Solver finished in %.2f seconds: %d/%d sessions scheduled (%.1f%%)", elapsed,
+                    len(self.assignments), len(self.variables),
+                    len(self.assignments) / len(self.variables) * 100 if self.variables else 0.0)
+        self._report_best(self.assignments)  # Final delta: the stream now matches export_to_dict()
+        self._report_progress("finished", scheduled=len(self.assignments), total=len(self.variables),
+                              elapsed=round(elapsed, 2))
+        
+        return len(self.assignments) > 0
+    
+    def _targets_met(self):
+        """Whether the current assignments meet the targets of the solve (see solve_enhanced)"""
+        if self.target_count is None or len(self.assignments) < self.target_count:
+            return False
+        return self.target_soft_score is None or self.schedule_soft_score() <= self.target_soft_score
+    
+    def _solve_greedy(self, deadline=None):
+        """Run randomized greedy restarts until the targets are met or `deadline` passes
+        
+        Returns the best assignments found: most sessions placed, then lowest soft score.
+        The deadline defaults to the solve's; at least one attempt always runs.
+        """
         # Use FAST GREEDY algorithm instead of slow backtracking
+        deadline = deadline if deadline is not None else self.deadline
         best_assignments = {}
-        best_count = 0
+        best_key = None
+        attempt = 0
         
-        max_attempts = 5  # Try multiple times with different orders
-        
-        for attempt in range(max_attempts):
-            print(f"\n🔄 Attempt {attempt + 1}/{max_attempts}")
+        while True:
+            attempt += 1
+            logger.debug("Attempt %d", attempt)
+            self._report_progress("attempt", attempt=attempt)
+            self.diagnostics.count("attempts")
             
-            # Clear previous assignments
-            self.assignments = {}
+            # Clear previous assignments (pinned sessions go back in first)
+            self.reset_assignments(self.pinned)
             
-            # Recreate domains with randomization
-            self.create_domains()
+            # Start from the propagated base domains - packed domains are read-only, so a
+            # shallow copy is enough; the attempt's randomness comes from the value scores
+            # and the MRV tie-breaking in _greedy_schedule
+            self.domains = dict(self.base_domains)
             
             # GREEDY SCHEDULING: Assign each variable to best available slot
             scheduled = self._greedy_schedule()
             
             # Keep track of best result
-            if scheduled > best_count:
-                best_count = scheduled
+            key = (scheduled, -self.schedule_soft_score())
+            if best_key is None or key > best_key:
+                if best_key is None or scheduled > best_key[0]:
+                    logger.info("New best: %d/%d sessions scheduled", scheduled, len(self.variables))
+                best_key = key
                 best_assignments = dict(self.assignments)
-                print(f"   ✨ New best: {best_count}/{len(self.variables)} sessions scheduled ({best_count/len(self.variables)*100:.1f}%)")
-            
-            # If we got 95%+ success, that's good enough
-            if scheduled >= len(self.variables) * 0.95:
-                print(f"   ✅ Excellent result (95%+ scheduled)!")
-                break
+                self._report_best(self.assignments)
+                
+                # Good enough: stop restarting
+                if self._targets_met():
+                    logger.debug("Targets met after %d attempts", attempt)
+                    break
             
-            # Check elapsed time
-            elapsed = time.time() - start_time
-            if elapsed > 20:  # Stop after 20 seconds
-                print(f"   ⏰ Time limit reached ({elapsed:.1f}s)")
+            if deadline is not None and time.time() >= deadline:
+                logger.info("Time limit reached after %d attempts", attempt)
                 break
         
-        # Use the best assignments found
-        self.assignments = best_assignments
-        for var, assignment in self.assignments.items():
-            var.assignment = assignment
-        
-        end_time = time.time()
-        elapsed = end_time - start_time
-        
-        print(f"\n{'='*80}")
-        print(f"✅ Solver finished in {elapsed:.2f} seconds")
-        print(f"📊 Scheduled: {len(self.assignments)}/{len(self.variables)} sessions ({(len(self.assignments)/len(self.variables)*100):.1f}%)")
-        print(f"{'='*80}")
+        return best_assignments
+    
+    def _solve_backtrack(self):
+        """Run the complete backtracking search and return the assignments it reached"""
+        self.reset_assignments(self.pinned)
         
-        return len(self.assignments) > 0
+        # Sessions without any candidate were set aside by propagate_constraints()
+        if self._backtrack_enhanced():
+            logger.debug("All %d schedulable sessions placed", len(self.variables) - len(self.unschedulable))
+        return dict(self.assignments)
     
+    @timed("greedy_schedule")
     def _greedy_schedule(self):
         """Fast greedy scheduling algorithm"""
-        # Sort variables by domain size (most constrained first)
-        sorted_vars = sorted(self.variables, key=lambda v: len(self.domains.get(v, [])))
+        # Sort variables by domain size (most constrained first, ties in random order)
+        sorted_vars = sorted(self.variables, key=lambda v: (len(self.domains.get(v, [])), self.rng.random()))
         
         scheduled = 0
         for i, variable in enumerate(sorted_vars):
+            # Another parallel attempt already reached the target, or the solve is out of time
+            if self.stop_event is not None and self.stop_event.is_set():
+                break
+            if self.deadline is not None and time.time() > self.deadline:
+                break
+            
             # Progress indicator every 20 sessions
             if i % 20 == 0 and i > 0:
-                print(f"     Progress: {i}/{len(sorted_vars)} sessions processed, {scheduled} scheduled")
+                logger.debug("Progress: %d/%d sessions processed, %d scheduled", i, len(sorted_vars), scheduled)
+            if i % self.progress_interval == 0 and i > 0:
+                self._report_progress("progress", processed=i, scheduled=scheduled, total=len(sorted_vars))
+            
+            # Already placed (kept from a previous timetable)
+            if variable in self.assignments:
+                continue
             
             # Get ordered domain values
             domain = self.order_domain_values(variable)
@@ -467,82 +1073,643 @@ class EnhancedCSPTimetable:
                 
                 if self.is_assignment_valid(variable, timeslot, room, instructor):
                     # Make assignment
-                    self.assignments[variable] = assignment
-                    variable.assignment = assignment
+                    self.assign(variable, assignment)
                     scheduled += 1
                     break
         
         return scheduled
-
+    
+    def _blockers(self, variable, timeslot, room, instructor, variable_by_key):
+        """Placed sessions that would have to move for this value to become valid"""
+        blockers = set()
+        occupant = self.room_occupancy.get((timeslot.id, room.room_id))
+        if occupant is not None:
+            blockers.add(occupant)
+        occupant = self.instructor_occupancy.get((timeslot.id, instructor.instructor_id))
+        if occupant is not None:
+            blockers.add(occupant)
+        for section_id in self.course_slot_sections.get((variable.course_id, timeslot.id), ()):
+            if section_kind(section_id) != variable.kind:
+                blockers.add(variable_by_key[(variable.course_id, section_id)])
+        for other_id in self.cohort_courses.get(variable.course_id, ()):
+            for section_id in self.course_slot_sections.get((other_id, timeslot.id), ()):
+                blockers.add(variable_by_key[(other_id, section_id)])
+        
+        if self.instructor_day_load.get((instructor.instructor_id, timeslot.day), 0) >= 4 and not any(
+                self.assignments[b][2].instructor_id == instructor.instructor_id and self.assignments[b][0].day == timeslot.day
+                for b in blockers):
+            # Daily limit reached: one of the instructor's classes that day has to go
+            for other_slot in self.slots_by_day.get(timeslot.day, ()):
+                occupant = self.instructor_occupancy.get((other_slot.id, instructor.instructor_id))
+                if occupant is not None:
+                    blockers.add(occupant)
+                    break
+        return blockers
+    
+    @timed("repair")
+    def repair_unplaced(self, time_limit=5.0, tabu_tenure=7, sample_size=200, goal=None):
+        """Min-conflicts / tabu repair of the sessions left unplaced by greedy construction
+        
+        Each step takes an unplaced session and picks the domain value blocked by the
+        fewest placed sessions (counted with O(1) occupancy lookups). Blockers are moved
+        out to make room and go back on the unplaced list - an ejection chain. A session
+        placed recently is tabu and can't be ejected again for `tabu_tenure` steps, which
+        stops the chain from cycling. The best assignment seen is kept. Stops once `goal`
+        sessions (default: the preprocessing upper bound) are placed.
+        """
+        deadline = time.time() + time_limit
+        if goal is None:
+            goal = self.preprocessing['max_schedulable'] if self.preprocessing else len(self.variables)
+        variable_by_key = {(v.course_id, v.section_id): v for v in self.variables}
+        
+        unplaced = [v for v in self.variables if v not in self.assignments and self.domains.get(v)]
+        if not unplaced:
+            return 0
+        start_count = len(self.assignments)
+        best_assignments = dict(self.assignments)
+        tabu_until = {}
+        max_steps = 200 * len(unplaced)
+        stalled = 0  # Consecutive steps without a usable value
+        
+        logger.debug("Repairing %d unplaced sessions (min-conflicts + tabu)", len(unplaced))
+        
+        for step in range(max_steps):
+            if not unplaced or len(best_assignments) >= goal or time.time() > deadline:
+                break
+            
+            variable = unplaced.pop(self.rng.randrange(len(unplaced)))
+            domain = self.domains[variable]
+            if len(domain) > sample_size:
+                domain = self.rng.sample(domain, sample_size)
+            
+            # Min-conflicts: value with the fewest non-tabu blockers (ties broken randomly)
+            best_value, best_blockers = None, None
+            for value in domain:
+                blockers = self._blockers(variable, *value, variable_by_key)
+                if any(tabu_until.get(b, -1) > step or b in self.fixed for b in blockers):
+                    continue
+                if best_blockers is None or len(blockers) < len(best_blockers) or (
+                        len(blockers) == len(best_blockers) and self.rng.random() < 0.5):
+                    best_value, best_blockers = value, blockers
+                    if not blockers:
+                        break
+            
+            if best_value is None:
+                unplaced.append(variable)
+                stalled += 1
+                # Every unplaced session is walled in by fixed (or tabu) sessions
+                if stalled > 2 * len(unplaced) + tabu_tenure:
+                    break
+                continue
+            stalled = 0
+            
+            for blocker in best_blockers:
+                self.unassign(blocker)
+                unplaced.append(blocker)
+            self.assign(variable, best_value)
+            tabu_until[variable] = step + tabu_tenure
+            
+            if len(self.assignments) > len(best_assignments):
+                best_assignments = dict(self.assignments)
+                logger.debug("Repair step %d: %d/%d sessions scheduled", step, len(best_assignments), len(self.variables))
+                self._report_best(best_assignments)
+        
+        self.reset_assignments(best_assignments)
+        return len(self.assignments) - start_count
+    
+    def _neighbourhood(self, max_size):
+        """Placed, movable sessions sharing a random day, instructor or room (at most max_size)"""
+        movable = [v for v in self.assignments if v not in self.fixed]
+        if not movable:
+            return []
+        kind = self.rng.choice(("day", "instructor", "room"))
+        timeslot, room, instructor = self.assignments[self.rng.choice(movable)]
+        if kind == "day":
+            chosen = [v for v in movable if self.assignments[v][0].day == timeslot.day]
+        elif kind == "instructor":
+            chosen = [v for v in movable if self.assignments[v][2].instructor_id == instructor.instructor_id]
+        else:
+            chosen = [v for v in movable if self.assignments[v][1].room_id == room.room_id]
+        return self.rng.sample(chosen, max_size) if len(chosen) > max_size else chosen
+    
+    @timed("improve")
+    def improve_soft_score(self, time_limit=5.0, max_size=30):
+        """Large neighbourhood search on the soft score of a finished timetable
+        
+        Each iteration destroys a neighbourhood - the sessions of one day, one instructor
+        or one room's week (up to max_size, pinned and fixed sessions stay) - and
+        rebuilds it with the greedy value ordering, also trying the unplaced sessions.
+        The result is kept when it places more sessions or the same number with a lower
+        schedule_soft_score(), otherwise the old placements go back. Stops at the time
+        limit or once target_soft_score is reached. The score over time is kept in
+        self.improvement_report['history'] as [seconds, soft score] pairs.
+        """
+        start = time.time()
+        deadline = start + time_limit
+        if self.base_domains:
+            self.domains = dict(self.base_domains)
+        current_key = (len(self.assignments), -self.schedule_soft_score())
+        initial_score = -current_key[1]
+        history = [[0.0, initial_score]]
+        iterations = accepted = 0
+        
+        logger.debug("Improving the soft score (%.2f) with large neighbourhood search", initial_score)
+        
+        while time.time() < deadline:
+            if self.target_soft_score is not None and -current_key[1] <= self.target_soft_score:
+                break
+            destroyed = self._neighbourhood(max_size)
+            if not destroyed:
+                break
+            iterations += 1
+            self.diagnostics.count("lns_iterations")
+            
+            previous = {v: self.assignments[v] for v in destroyed}
+            for variable in destroyed:
+                self.unassign(variable)
+            
+            # Rebuild most-constrained first, giving unplaced sessions a chance too
+            candidates = destroyed + [v for v in self.variables if v not in self.assignments
+                                      and v not in previous and self.domains.get(v)]
+            candidates.sort(key=lambda v: (len(self.domains[v]), self.rng.random()))
+            for variable in candidates:
+                for timeslot, room, instructor in self.order_domain_values(variable):
+                    if self.is_assignment_valid(variable, timeslot, room, instructor):
+                        self.assign(variable, (timeslot, room, instructor))
+                        break
+            
+            # Equal scores are kept too, so the search can drift across plateaus
+            key = (len(self.assignments), -self.schedule_soft_score())
+            if key >= current_key:
+                if key > current_key:
+                    accepted += 1
+                    history.append([round(time.time() - start, 3), -key[1]])
+                    self._report_progress("improved", iteration=iterations, soft_score=-key[1],
+                                          elapsed=round(time.time() - start, 2))
+                    self._report_best(self.assignments)
+                current_key = key
+                continue
+            
+            # No better: put the neighbourhood back as it was
+            for variable in candidates:
+                if variable in self.assignments:
+                    self.unassign(variable)
+            for variable, assignment in previous.items():
+                self.assign(variable, assignment)
+        
+        self.improvement_report = {
+            'iterations': iterations,
+            'accepted': accepted,
+            'initial_soft_score': initial_score,
+            'soft_score': -current_key[1],
+            'history': history,
+        }
+        logger.info("Neighbourhood search: soft score %.2f -> %.2f in %d iterations (%d accepted)",
+                    initial_score, -current_key[1], iterations, accepted)
+        return initial_score - (-current_key[1])
+    
+    def resolve_incremental(self, schedule, time_limit=5.0, pinned=()):
+        """Warm-start re-solve after a data edit, starting from a previous timetable
+        
+        Previous placements that still satisfy every hard constraint are kept and fixed.
+        Only the sessions the edit invalidated (deleted room or timeslot, lost
+        qualification, new unavailable day...) and the ones left unplaced before are
+        scheduled again - greedily, then by repair_unplaced() around the fixed sessions.
+        `pinned` entries (see pin_assignments) stay pinned; pins the edit broke are
+        dropped and rescheduled like any other session.
+        Returns a report: kept, invalidated, unpinned, rescheduled, scheduled, total, elapsed.
+        """
+        start_time = time.time()
+        self.deadline = start_time + time_limit
+        self.target_count = self.target_soft_score = None
+        self.targets_met = False
+        self.diagnostics.reset()
+        logger.info("Starting incremental re-solve from the previous timetable")
+        
+        self.precompile()
+        self.variables = []
+        self.domains = {}
+        self.create_variables()
+        
+        # Carry the pins over, one at a time so a broken pin doesn't take the others along
+        valid_pins = []
+        unpinned = []
+        for entry in pinned:
+            try:
+                self.pin_assignments(valid_pins + [entry])
+                valid_pins.append(entry)
+            except ValueError:
+                unpinned.append(f"{entry.get('course_id')}-{entry.get('section_id', 'S1')}")
+        self.pin_assignments(valid_pins)
+        if unpinned:
+            logger.warning("%d pinned sessions no longer fit the data and were unpinned: %s",
+                           len(unpinned), ", ".join(unpinned))
+        
+        self.create_domains()
+        self._published_best = {}
+        self._report_progress("started", mode="incremental", total=len(self.variables))
+        self.propagate_constraints()
+        
+        previous_keys = {(entry['course_id'], entry['section_id']) for entry in schedule}
+        previous = self._schedule_assignments(schedule)
+        self.reset_assignments(self.pinned)
+        for variable, (timeslot, room, instructor) in previous.items():
+            if variable not in self.assignments and self.is_assignment_valid(variable, timeslot, room, instructor):
+                self.assign(variable, (timeslot, room, instructor))
+        
+        kept = set(self.assignments)
+        kept_keys = {(v.course_id, v.section_id) for v in kept}
+        invalidated = sorted(f"{course_id}-{section_id}" for course_id, section_id in previous_keys - kept_keys)
+        logger.debug("Kept %d sessions, %d invalidated by the edit", len(kept), len(invalidated))
+        
+        saved_fixed = self.fixed
+        self.fixed = saved_fixed | kept | set(self.pinned)
+        try:
+            self._greedy_schedule()
+            if len(self.assignments) < self.preprocessing['max_schedulable']:
+                self.repair_unplaced(time_limit=max(0.0, self.deadline - time.time()))
+        finally:
+            self.fixed = saved_fixed
+        
+        elapsed = time.time() - start_time
+        self.diagnostics.record_time("total", elapsed)
+        report = {
+            'kept': len(kept),
+            'invalidated': invalidated,
+            'unpinned': unpinned,
+            'rescheduled': len(self.assignments) - len(kept),
+            'scheduled': len(self.assignments),
+            'total': len(self.variables),
+            'elapsed': round(elapsed, 3)
+        }
+        logger.info("Incremental re-solve finished in %.2f seconds: %d sessions rescheduled, %d/%d scheduled",
+                    elapsed, report['rescheduled'], len(self.assignments), len(self.variables))
+        self._report_best(self.assignments)
+        self._report_progress("finished", scheduled=len(self.assignments), total=len(self.variables),
+                              elapsed=round(elapsed, 2))
+        return report
+    
+    def _build_neighbour_index(self):
+        """Index which variables could use each room, instructor and course
+        
+        Forward checking after an assignment only has to visit the variables that share
+        its room, instructor or course - everything else is unaffected.
+        """
+        self.room_variables = defaultdict(list)
+        self.instructor_variables = defaultdict(list)
+        self.course_variables = defaultdict(list)
+        for variable in self.variables:
+            self.course_variables[variable.course_id].append(variable)
+            room_ids, instructor_ids = self._domain_entities(variable)
+            for room_id in room_ids:
+                self.room_variables[room_id].append(variable)
+            for instructor_id in instructor_ids:
+                self.instructor_variables[instructor_id].append(variable)
+    
+    def _domain_entities(self, variable):
+        """Room ids and instructor ids a variable's domain may use
+        
+        Taken from create_domains() without decoding the domain. Propagation only removes
+        values, so this stays a superset of what the current domain uses.
+        """
+        entities = self.domain_entities.get(variable)
+        if entities is None:
+            domain = self.domains.get(variable, [])
+            entities = ({room.room_id for _, room, _ in domain}, {instructor.instructor_id for _, _, instructor in domain})
+        return entities
+    
+    def _propagate_assignment(self, variable, assignment, trail):
+        """Forward check the neighbours of a fresh assignment, recording removals on the trail"""
+        timeslot, room, instructor = assignment
+        encoder = self.domain_encoder
+        slot = encoder.slot_index[timeslot.id]
+        room_idx = encoder.room_index[room.room_id]
+        instructor_idx = encoder.instructor_index[instructor.instructor_id]
+        # Instructor reached the daily limit: drop their other slots on that day too
+        day_slots = ()
+        if self.instructor_day_load.get((instructor.instructor_id, timeslot.day), 0) >= 4:
+            day_slots = [encoder.slot_index[t.id] for t in self.slots_by_day[timeslot.day]]
+        
+        neighbours = set(self.room_variables.get(room.room_id, ()))
+        neighbours.update(self.instructor_variables.get(instructor.instructor_id, ()))
+        neighbours.update(self.slot_neighbours(variable.course_id))
+        
+        for other in neighbours:
+            if other is variable or other in self.assignments or other in self.unschedulable:
+                continue
+            domain = self.domains[other]
+            # Lecture and lab sections of one course (or courses of one cohort) can't share a timeslot either
+            pruned = domain.without(slot, room_idx, instructor_idx, whole_slot=self.sessions_clash(variable, other),
+                                    instructor_slots=day_slots)
+            if pruned is not domain:
+                trail.append((other, domain))
+                self.domains[other] = pruned
+    
+    def _undo_trail(self, trail, mark):
+        """Restore the domains recorded on the trail after position mark"""
+        while len(trail) > mark:
+            other, domain = trail.pop()
+            self.domains[other] = domain
+    
+    def _support_counts(self, domain):
+        """Count a domain's values per slot, (slot, room), (slot, instructor) and (slot, room, instructor)"""
+        by_slot = defaultdict(int)
+        by_room = defaultdict(int)
+        by_instructor = defaultdict(int)
+        by_both = defaultdict(int)
+        for timeslot, room, instructor in domain:
+            by_slot[timeslot.id] += 1
+            by_room[(timeslot.id, room.room_id)] += 1
+            by_instructor[(timeslot.id, instructor.instructor_id)] += 1
+            by_both[(timeslot.id, room.room_id, instructor.instructor_id)] += 1
+        return {
+            'size': len(domain),
+            'max_slot': max(by_slot.values(), default=0),
+            'slot': by_slot,
+            'room': by_room,
+            'instructor': by_instructor,
+            'both': by_both,
+        }
+    
+    def _spans_one_slot(self, domain):
+        """Whether all values of a domain share one timeslot"""
+        if isinstance(domain, PackedDomain):
+            return domain.spans_one_slot()
+        return len({timeslot.id for timeslot, _, _ in domain}) <= 1
+    
+    def enforce_arc_consistency(self, variables):
+        """AC-3 over the pairwise room, instructor, same-course and cohort clash constraints
+        
+        A value of X is supported by Y unless every value of Y clashes with it. Instead of
+        scanning D(Y) for a support, Y's values are counted per slot / room / instructor, so
+        the number of clashing values is an O(1) lookup. Any Y whose domain spans two or
+        more timeslots supports everything, so only arcs towards single-slot domains are
+        ever queued - and only those domains get counted and have their neighbours found.
+        
+        Returns (domains, conflicts, values_removed) where conflicts lists the
+        (wiped-out variable, culprit variable) pairs.
+        """
+        domains = {v: self.domains[v] for v in variables}
+        counts = {}
+        active = set(variables)
+        found_neighbours = {}
+        
+        def single_slot(variable):
+            return self._spans_one_slot(domains[variable])
+        
+        def neighbours(variable):
+            if variable not in found_neighbours:
+                found = set(self.slot_neighbours(variable.course_id))
+                room_ids, instructor_ids = self._domain_entities(variable)
+                for room_id in room_ids:
+                    found.update(self.room_variables.get(room_id, ()))
+                for instructor_id in instructor_ids:
+                    found.update(self.instructor_variables.get(instructor_id, ()))
+                found.discard(variable)
+                found_neighbours[variable] = found
+            return found_neighbours[variable] & active
+        
+        queue = deque((x, y) for y in variables if single_slot(y) for x in neighbours(y))
+        queued = set(queue)
+        conflicts = []
+        removed = 0
+        
+        while queue:
+            x, y = queue.popleft()
+            queued.discard((x, y))
+            if x not in active or y not in active:
+                continue
+            # Domains only shrink, so y still spans a single slot
+            if y not in counts:
+                counts[y] = self._support_counts(domains[y])
+            support = counts[y]
+            
+            if self.sessions_clash(x, y):
+                def clashes(t, r, i):
+                    return support['slot'].get(t.id, 0)
+            else:
+                def clashes(t, r, i):
+                    return (support['room'].get((t.id, r.room_id), 0)
+                            + support['instructor'].get((t.id, i.instructor_id), 0)
+                            - support['both'].get((t.id, r.room_id, i.instructor_id), 0))
+            
+            revised = domains[x].filter(lambda t, r, i: clashes(t, r, i) < support['size'])
+            if len(revised) == len(domains[x]):
+                continue
+            
+            removed += len(domains[x]) - len(revised)
+            domains[x] = revised
+            counts.pop(x, None)
+            if not revised:
+                # X can't be placed alongside Y - report both and stop propagating from X
+                conflicts.append((x, y))
+                active.discard(x)
+                continue
+            if not single_slot(x):
+                continue  # X still supports every value of its neighbours
+            for z in neighbours(x):
+                if (z, x) not in queued:
+                    queue.append((z, x))
+                    queued.add((z, x))
+        
+        return domains, conflicts, removed
+    
+    def _overloaded_instructors(self, variables):
+        """Find instructors who are the only option for more sessions than they can teach"""
+        sole_sessions = defaultdict(list)
+        for variable in variables:
+            domain = self.domains[variable]
+            if isinstance(domain, PackedDomain):
+                instructors = domain.instructor_ids()
+            else:
+                instructors = {instructor.instructor_id for _, _, instructor in domain}
+            if len(instructors) == 1:
+                sole_sessions[instructors.pop()].append(variable)
+        
+        overloaded = []
+        for instructor_id, sessions in sole_sessions.items():
+            slots_by_day = defaultdict(set)
+            for variable in sessions:
+                for timeslot, _, _ in self.domains[variable]:
+                    slots_by_day[timeslot.day].add(timeslot.id)
+            # HARD CONSTRAINT 6: at most 4 classes per day
+            capacity = sum(min(4, len(slots)) for slots in slots_by_day.values())
+            if len(sessions) > capacity:
+                overloaded.append({'instructor_id': instructor_id, 'sessions': sessions, 'capacity': capacity})
+        return overloaded
+    
+    def _room_type_excess(self, variables):
+        """How many sessions of each room type exceed rooms x timeslots"""
+        demand = defaultdict(int)
+        for variable in variables:
+            demand[self.required_room_type(variable)] += 1
+        return sum(max(0, count - len(self.rooms_by_type.get(room_type, ())) * len(self.timeslots))
+                   for room_type, count in demand.items())
+    
+    @timed("propagate_constraints")
+    def propagate_constraints(self):
+        """Preprocess domains before search: AC-3 plus cheap capacity checks
+        
+        Sets aside sessions with empty domains, shrinks the remaining domains with
+        arc consistency and computes an upper bound on how many sessions can be placed.
+        Domains are only replaced when AC-3 finds no wipe-out - a wipe-out means a full
+        placement is impossible, and the culprits are reported instead.
+        """
+        self._build_neighbour_index()
+        self.unschedulable = {v for v in self.variables if not self.domains.get(v)}
+        schedulable = [v for v in self.variables if v not in self.unschedulable]
+        
+        domains, conflicts, removed = self.enforce_arc_consistency(schedulable)
+        if not conflicts:
+            self.domains.update(domains)
+        self.diagnostics.domains['after_propagation'] = sum(len(self.domains.get(v, ())) for v in self.variables)
+        
+        overloaded = self._overloaded_instructors(schedulable)
+        instructor_excess = sum(len(o['sessions']) - o['capacity'] for o in overloaded)
+        max_schedulable = len(schedulable) - max(instructor_excess, self._room_type_excess(schedulable))
+        
+        label = lambda v: f"{v.course_id}-{v.section_id}"
+        self.preprocessing = {
+            'arc_consistent': not conflicts,
+            'values_removed': removed if not conflicts else 0,
+            'unschedulable_sessions': sorted(label(v) for v in self.unschedulable),
+            'conflicts': [[label(x), label(y)] for x, y in conflicts],
+            'overloaded_instructors': [
+                {'instructor_id': o['instructor_id'], 'capacity': o['capacity'],
+                 'sessions': [label(v) for v in o['sessions']]}
+                for o in overloaded
+            ],
+            'max_schedulable': max_schedulable,
+        }
+        
+        # Workers repeat the parent's propagation - only the parent warns
+        level = logging.WARNING if self.data_warnings else logging.DEBUG
+        if self.unschedulable:
+            logger.log(level, "%d sessions have no valid (timeslot, room, instructor) option", len(self.unschedulable))
+        for x, y in conflicts:
+            logger.log(level, "%s cannot be placed together with %s", label(x), label(y))
+        for o in overloaded:
+            logger.log(level, "%s is the only option for %d sessions but can teach %d",
+                       o['instructor_id'], len(o['sessions']), o['capacity'])
+        logger.info("Arc consistency removed %d values; at most %d/%d sessions can be placed",
+                    self.preprocessing['values_removed'], max_schedulable, len(self.variables))
+        
+        return self.preprocessing
+    
+    def _search_candidates(self, variable):
+        """All domain values in soft-score order, then None (leave the session unplaced)"""
+        yield from self.order_domain_values(variable, sample_size=None)
+        yield None
+    
+    @timed("backtrack")
     def _backtrack_enhanced(self):
-        """Enhanced backtracking with better heuristics"""
-        # Check timeout
-        if time.time() - self.start_time > self.timeout_seconds:
-            print("⏰ Timeout reached!")
-            return False
+        """Complete depth-first branch-and-bound search maximising placed sessions
         
-        # Check if complete
-        if len(self.assignments) == len(self.variables):
-            return True
+        Each session tries every value of its domain (MRV order, forward checked) and,
+        last, staying unplaced. A branch is cut as soon as the sessions already placed
+        plus those still having a non-empty domain cannot beat the best found so far.
+        Only the domains a step actually shrank go on the trail, so undoing a step
+        restores exactly what changed instead of copying every domain. The search is
+        iterative so large catalogs don't hit Python's recursion limit.
         
-        # Select variable using MRV
-        variable = self.select_unassigned_variable()
-        if variable is None:
-            return True
+        Returns True when every schedulable session is placed. Otherwise (search
+        exhausted or timed out) the best partial assignment found is kept.
+        """
+        trail = []      # (variable, domain before pruning)
+        stack = []      # [variable, remaining candidates, trail mark of the current value]
+        skipped = set()
+        goal = len(self.variables) - len(self.unschedulable)
+        if self.preprocessing:
+            goal = min(goal, self.preprocessing['max_schedulable'])
+        if self.target_count is not None:
+            goal = min(goal, self.target_count)
+        best_assignments = dict(self.assignments)
         
-        # Progress indicator
-        progress = len(self.assignments)
-        if progress % 10 == 0:
-            elapsed = time.time() - self.start_time
-            print(f"  Progress: {progress}/{len(self.variables)} classes assigned ({elapsed:.1f}s)")
+        def open_variables():
+            return [v for v in self.variables
+                    if v not in self.assignments and v not in skipped and v not in self.unschedulable]
         
-        # Order domain values
-        ordered_domain = self.order_domain_values(variable)
+        pending = open_variables()
+        if not pending:
+            return True
+        # Select variable using MRV
+        variable = min(pending, key=lambda v: len(self.domains[v]))
+        stack.append([variable, self._search_candidates(variable), None])
         
-        for assignment in ordered_domain:
-            timeslot, room, instructor = assignment
+        while stack:
+            # Check timeout
+            if time.time() > self.deadline:
+                logger.info("Backtracking timeout reached")
+                break
             
-            if self.is_assignment_valid(variable, timeslot, room, instructor):
-                # Save current state
-                original_domains = {v: list(self.domains.get(v, [])) for v in self.variables}
-                
-                # Make assignment
-                self.assignments[variable] = assignment
-                variable.assignment = assignment
-                
-                # Forward checking
-                if self.forward_check():
-                    if self._backtrack_enhanced():
-                        return True
-                
-                # Backtrack
-                del self.assignments[variable]
-                variable.assignment = None
-                self.domains = original_domains
+            frame = stack[-1]
+            variable, candidates, mark = frame
+            if mark is not None:
+                # Backtrack: undo the value tried last time at this depth
+                self._undo_trail(trail, mark)
+                if variable in self.assignments:
+                    self.unassign(variable)
+                else:
+                    skipped.discard(variable)
+                frame[2] = None
+            
+            for assignment in candidates:
+                mark = len(trail)
+                if assignment is None:
+                    skipped.add(variable)
+                    break
+                if self.is_assignment_valid(variable, *assignment):
+                    self.assign(variable, assignment)
+                    self._propagate_assignment(variable, assignment, trail)
+                    break
+            else:
+                # No value left for this variable - go back one level
+                stack.pop()
+                continue
+            frame[2] = mark
+            
+            if len(self.assignments) > len(best_assignments):
+                best_assignments = dict(self.assignments)
+                if len(best_assignments) >= goal:
+                    return True
                 
+                # Progress indicator
+                if len(best_assignments) % 10 == 0:
+                    elapsed = time.time() - self.start_time
+                    logger.debug("Progress: %d/%d classes assigned (%.1fs)", len(best_assignments), len(self.variables), elapsed)
+                self._report_best(best_assignments)
+            
+            # Bound: can this branch still place more sessions than the best so far?
+            pending = open_variables()
+            reachable = [v for v in pending if self.domains[v]]
+            if not pending or len(self.assignments) + len(reachable) <= len(best_assignments):
+                continue
+            
+            # Select variable using MRV
+            variable = min(pending, key=lambda v: len(self.domains[v]))
+            stack.append([variable, self._search_candidates(variable), None])
+        
+        # Search exhausted or timed out - restore domains and keep the best assignment
+        self._undo_trail(trail, 0)
+        self.reset_assignments(best_assignments)
         return False
     
     def get_statistics(self):
-        """Get statistics about the generated timetable"""
+        """Get statistics about the generated timetable (read from the running counters)"""
         if not self.assignments:
             return None
         
-        stats = {
+        instructor_workload = defaultdict(int)
+        for instructor_id, count in self.instructor_workload.items():
+            instructor_workload[self.instructor_names.get(instructor_id, instructor_id)] += count
+        
+        return {
             'total_classes': len(self.assignments),
-            'day_distribution': defaultdict(int),
-            'instructor_workload': defaultdict(int),
-            'room_utilization': defaultdict(int),
-            'timeslot_usage': defaultdict(int)
+            'day_distribution': defaultdict(int, self.day_load),
+            'instructor_workload': instructor_workload,
+            'room_utilization': defaultdict(int, self.room_load),
+            'timeslot_usage': defaultdict(int, self.slot_load)
         }
-        
-        for variable, assignment in self.assignments.items():
-            timeslot, room, instructor = assignment
-            stats['day_distribution'][timeslot.day] += 1
-            stats['instructor_workload'][instructor.name] += 1
-            stats['room_utilization'][room.room_id] += 1
-            stats['timeslot_usage'][timeslot.id] += 1
-        
-        return stats
     
     def print_solution(self):
         """Print the generated timetable in a formatted way"""
@@ -563,7 +1730,7 @@ class EnhancedCSPTimetable:
             if key not in schedule_by_timeslot:
                 schedule_by_timeslot[key] = []
                 
-            course = next((c for c in self.courses if c.course_id == variable.course_id), None)
+            course = self.course_by_id.get(variable.course_id)
             schedule_by_timeslot[key].append({
                 'course_id': variable.course_id,
                 'course_name': course.name if course else 'Unknown',
@@ -615,6 +1782,29 @@ class EnhancedCSPTimetable:
             for instructor, count in top_instructors:
                 print(f"  {instructor[:30]:30}: {count:2} classes")
     
+    def _export_entry(self, variable, assignment):
+        """One schedule entry of export_to_dict()"""
+        timeslot, room, instructor = assignment
+        course = self.course_by_id.get(variable.course_id)
+        
+        return {
+            'course_id': variable.course_id,
+            'course_name': course.name if course else 'Unknown',
+            'course_type': course.type if course else 'Unknown',
+            'section_id': variable.section_id,
+            'section_size': variable.size,
+            'pinned': variable in self.pinned,
+            'day': timeslot.day,
+            'start_time': timeslot.start_time,
+            'end_time': timeslot.end_time,
+            'room_id': room.room_id,
+            'room_type': room.type,
+            'room_capacity': room.capacity,
+            'instructor_id': instructor.instructor_id,
+            'instructor_name': instructor.name,
+            'instructor_role': instructor.role
+        }
+    
     def export_to_dict(self):
         """Export timetable to dictionary format for JSON serialization"""
         result = {
@@ -625,24 +1815,33 @@ class EnhancedCSPTimetable:
         }
         
         for variable, assignment in self.assignments.items():
-            timeslot, room, instructor = assignment
-            course = next((c for c in self.courses if c.course_id == variable.course_id), None)
-            
-            result['schedule'].append({
-                'course_id': variable.course_id,
-                'course_name': course.name if course else 'Unknown',
-                'course_type': course.type if course else 'Unknown',
-                'section_id': variable.section_id,
-                'day': timeslot.day,
-                'start_time': timeslot.start_time,
-                'end_time': timeslot.end_time,
-                'room_id': room.room_id,
-                'room_type': room.type,
-                'room_capacity': room.capacity,
-                'instructor_id': instructor.instructor_id,
-                'instructor_name': instructor.name,
-                'instructor_role': instructor.role
-            })
+            result['schedule'].append(self._export_entry(variable, assignment))
+        
+        # Add preprocessing findings (unschedulable sessions, culprits, upper bound)
+        if self.preprocessing:
+            result['preprocessing'] = self.preprocessing
+        
+        # Anytime result: soft score and the targets of the last solve
+        result['soft_score'] = self.schedule_soft_score()
+        result['targets'] = {
+            'placed': self.target_count,
+            'soft_score': self.target_soft_score,
+            'met': self.targets_met
+        }
+        
+        # Exact backend outcome: status and proven upper bound on placed sessions
+        if self.exact_report:
+            result['exact'] = self.exact_report
+        
+        # Neighbourhood search outcome: soft score before/after and its history
+        if self.improvement_report:
+            result['improvement'] = self.improvement_report
+        
+        # Seed of the solve: pass it back as solve_enhanced(seed=...) to replay it
+        result['seed'] = self.seed
+        
+        # Where the last solve spent its time (phase timers, counters, optional profile)
+        result['diagnostics'] = self.diagnostics.to_dict()
         
         # Add statistics
         stats = self.get_statistics()
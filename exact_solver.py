@@ -0,0 +1,427 @@
+# exact_solver.py - Exact 0/1 model of the timetable, solved by a pluggable backend
+import logging
+import time
+from collections import defaultdict
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # OR-Tools is optional - the 'cpsat' backend is unavailable without it
+    cp_model = None
+
+try:
+    import pulp
+except ImportError:  # PuLP is optional - the 'pulp' backend is unavailable without it
+    pulp = None
+
+logger = logging.getLogger(__name__)
+
+
+class ZeroOneModel:
+    """Backend-neutral 0/1 model: maximize the number of placed sessions
+
+    - x variables: one per (session, domain value), listed per session in `sessions`
+    - aux variables: "kind k of course c holds slot t" indicators, set by `implications`
+    - at_most: (variable indexes, rhs) - sum of the variables <= rhs
+    - exactly_one: variable indexes of a pinned session (its one value must be chosen)
+    - implications: (a, b) - a = 1 forces b = 1
+    """
+
+    def __init__(self):
+        self.n_vars = 0
+        self.values = []        # x variable index -> (session, packed code); aux variables are not listed
+        self.sessions = defaultdict(list)
+        self.at_most = []
+        self.exactly_one = []
+        self.implications = []
+
+    def new_var(self):
+        self.n_vars += 1
+        return self.n_vars - 1
+
+    @property
+    def objective(self):
+        """Indexes of the x variables - each placed session counts 1"""
+        return range(len(self.values))
+
+    @property
+    def n_constraints(self):
+        return len(self.at_most) + len(self.exactly_one) + len(self.implications)
+
+
+def model_size(solver):
+    """Number of x variables build_model() would create (one per remaining domain value)"""
+    return sum(len(solver.domains.get(v) or ()) for v in solver.variables if v not in solver.unschedulable)
+
+
+def build_model(solver, deadline=None):
+    """Build the 0/1 model from the solver's (propagated) domains and hard constraints
+
+    HARD CONSTRAINTS 1-3.5 and the blocked cells are already encoded in the domains.
+    The rest become rows of the model:
+    - each session takes at most one value (exactly one when pinned)
+    - 4/5: one session per (slot, room) and per (slot, instructor)
+    - 6: at most 4 sessions per (instructor, day)
+    - 7: the lecture and lab kinds of a course hold different slots
+    - 8: the courses of a cohort hold different slots
+    For 7 and 8 a kind of a course with several sections gets one "holds slot t"
+    indicator; a kind with a single session uses that session's values directly.
+    Returns None when `deadline` (a time.time() value) passes while building.
+    """
+    encoder = solver.domain_encoder
+    slot_day = [t.day for t in encoder.timeslots]
+    model = ZeroOneModel()
+
+    rooms = defaultdict(list)          # (slot, room) -> x variables
+    instructors = defaultdict(list)    # (slot, instructor) -> x variables
+    day_load = defaultdict(list)       # (instructor, day) -> x variables
+    kind_slot = defaultdict(list)      # (course_id, kind, slot) -> x variables
+    kind_sessions = defaultdict(int)   # (course_id, kind) -> sessions
+
+    for count, variable in enumerate(solver.variables):
+        if deadline is not None and count % 64 == 0 and time.time() > deadline:
+            return None
+        domain = solver.domains.get(variable)
+        if variable in solver.unschedulable or not domain:
+            continue
+        kind_sessions[(variable.course_id, variable.kind)] += 1
+        for code in domain.codes:
+            index = model.new_var()
+            model.values.append((variable, code))
+            model.sessions[variable].append(index)
+            slot, room, instructor = encoder.unpack(code)
+            rooms[(slot, room)].append(index)
+            instructors[(slot, instructor)].append(index)
+            day_load[(instructor, slot_day[slot])].append(index)
+            kind_slot[(variable.course_id, variable.kind, slot)].append(index)
+
+    for variable, indexes in model.sessions.items():
+        if variable in solver.pinned:
+            model.exactly_one.append(indexes)
+        else:
+            model.at_most.append((indexes, 1))
+    model.at_most.extend((indexes, 1) for indexes in rooms.values() if len(indexes) > 1)
+    model.at_most.extend((indexes, 1) for indexes in instructors.values() if len(indexes) > 1)
+    model.at_most.extend((indexes, 4) for indexes in day_load.values() if len(indexes) > 4)
+
+    # Which courses take part in a slot clash (7: several kinds, 8: a cohort)
+    course_kinds = defaultdict(set)
+    for course_id, kind in kind_sessions:
+        course_kinds[course_id].add(kind)
+    cohorts = [[course_id for course_id in cohort.course_ids if course_id in course_kinds]
+               for cohort in solver.cohorts]
+    cohorts = [members for members in cohorts if len(members) > 1]
+    clashing = {course_id for course_id, kinds in course_kinds.items() if len(kinds) > 1}
+    clashing.update(course_id for members in cohorts for course_id in members)
+
+    busy = defaultdict(list)  # (course_id, slot) -> variables, at most one of them per kind
+    for (course_id, kind, slot), indexes in kind_slot.items():
+        if course_id not in clashing:
+            continue
+        if kind_sessions[(course_id, kind)] == 1:
+            busy[(course_id, slot)].extend(indexes)
+        else:
+            holds = model.new_var()
+            model.implications.extend((index, holds) for index in indexes)
+            busy[(course_id, slot)].append(holds)
+
+    for course_id in clashing:
+        if len(course_kinds[course_id]) > 1:
+            for slot in range(encoder.n_slots):
+                if len(busy.get((course_id, slot), ())) > 1:
+                    model.at_most.append((busy[(course_id, slot)], 1))
+    for members in cohorts:
+        for slot in range(encoder.n_slots):
+            indexes = [index for course_id in members for index in busy.get((course_id, slot), ())]
+            if len(indexes) > 1:
+                model.at_most.append((indexes, 1))
+    return model
+
+
+class ExactResult:
+    """What a backend found: status, chosen x variables and the proven upper bound
+
+    status is 'optimal' (no better placement exists), 'feasible' (stopped early),
+    'infeasible' (the pins can't all hold) or 'unknown' (nothing found in time).
+    """
+
+    def __init__(self, status, chosen=(), bound=None):
+        self.status = status
+        self.chosen = list(chosen)
+        self.bound = bound
+
+
+class ExactBackend:
+    """Interface for exact solvers - subclass, implement solve() and register_backend()"""
+
+    name = None
+    # Rough model sizes (x variables) worth loading: per second of budget and at all (None: no limit)
+    values_per_second = None
+    max_values = None
+
+    @classmethod
+    def available(cls):
+        """Whether the backend's solver library is installed"""
+        return False
+
+    @classmethod
+    def fits(cls, n_values, time_limit):
+        """Whether a model with n_values x variables is worth loading with time_limit seconds left"""
+        if time_limit <= 0 or (cls.max_values is not None and n_values > cls.max_values):
+            return False
+        return cls.values_per_second is None or n_values <= cls.values_per_second * time_limit
+
+    def solve(self, model, time_limit, workers=None, stop_at=None, hint=()):
+        """Solve a ZeroOneModel within time_limit seconds and return an ExactResult
+
+        The time spent translating the model into the solver's API counts against
+        time_limit; the result is 'unknown' when nothing is left for the search.
+        stop_at: objective value (sessions placed) that is good enough to stop at.
+        hint: x variables of a known solution to start from.
+        """
+        raise NotImplementedError
+
+
+class CpSatBackend(ExactBackend):
+    """OR-Tools CP-SAT (pip install ortools)
+
+    The model is large but easy: with the default presolve, symmetry detection and
+    probing over the interchangeable rooms can use up the whole budget on one core.
+    The objective and the hint go straight into the model proto - building them
+    as expressions costs seconds on large models.
+    """
+
+    name = "cpsat"
+    values_per_second = 5000  # Loading alone takes about a second per 70k values
+    parameters = {"symmetry_level": 0, "cp_model_probing_level": 0, "max_presolve_iterations": 1}
+    default_workers = 8  # The portfolio only includes its LNS workers from about 8 on
+
+    @classmethod
+    def available(cls):
+        return cp_model is not None
+
+    def solve(self, model, time_limit, workers=None, stop_at=None, hint=()):
+        started = time.time()
+        deadline = started + time_limit
+        cp = cp_model.CpModel()
+        x = [cp.NewBoolVar("") for _ in range(model.n_vars)]
+        for indexes, rhs in model.at_most:
+            if rhs == 1:
+                cp.AddAtMostOne(x[i] for i in indexes)
+            else:
+                cp.Add(cp_model.LinearExpr.Sum([x[i] for i in indexes]) <= rhs)
+        for indexes in model.exactly_one:
+            cp.AddExactlyOne(x[i] for i in indexes)
+        for a, b in model.implications:
+            cp.AddImplication(x[a], x[b])
+
+        # Maximize the number of placed sessions (a maximized proto objective is negated)
+        objective = cp.Proto().objective
+        objective.vars.extend(model.objective)
+        objective.coeffs.extend([-1] * len(model.objective))
+        objective.scaling_factor = -1
+        hint = set(hint)
+        if hint:
+            cp.Proto().solution_hint.vars.extend(model.objective)
+            cp.Proto().solution_hint.values.extend(int(i in hint) for i in model.objective)
+
+        # Handing the model to the solver and stopping its workers take about as long
+        # again as building it, so that much is kept back from the search
+        load_time = time.time() - started
+        time_left = deadline - time.time() - load_time
+        if time_left <= 0:
+            logger.info("No time left for CP-SAT after loading the model (%.2fs)", load_time)
+            return ExactResult("unknown")
+        solver = cp_model.CpSolver()
+        for name, value in self.parameters.items():
+            setattr(solver.parameters, name, value)
+        solver.parameters.max_time_in_seconds = time_left
+        solver.parameters.num_workers = workers or self.default_workers
+        callback = _StopAt(stop_at) if stop_at is not None else None
+        status = solver.Solve(cp, callback)
+
+        statuses = {cp_model.OPTIMAL: "optimal", cp_model.FEASIBLE: "feasible", cp_model.INFEASIBLE: "infeasible"}
+        status = statuses.get(status, "unknown")
+        if status not in ("optimal", "feasible"):
+            return ExactResult(status)
+        values = solver.ResponseProto().solution
+        chosen = [i for i in model.objective if values[i]]
+        return ExactResult(status, chosen, int(solver.BestObjectiveBound()))
+
+
+if cp_model is not None:
+    class _StopAt(cp_model.CpSolverSolutionCallback):
+        """Stop the search once a solution reaches the target objective"""
+
+        def __init__(self, target):
+            super().__init__()
+            self.target = target
+
+        def on_solution_callback(self):
+            if self.ObjectiveValue() >= self.target:
+                self.StopSearch()
+
+
+class PulpBackend(ExactBackend):
+    """PuLP with its bundled CBC solver (pip install pulp)"""
+
+    name = "pulp"
+    values_per_second = 2500
+    max_values = 100000  # CBC's root LP grows much faster than the model
+
+    @classmethod
+    def available(cls):
+        return pulp is not None
+
+    def solve(self, model, time_limit, workers=None, stop_at=None, hint=()):
+        deadline = time.time() + time_limit
+        problem = pulp.LpProblem("timetable", pulp.LpMaximize)
+        x = [pulp.LpVariable(f"x{i}", cat="Binary") for i in range(model.n_vars)]
+        problem += pulp.lpSum(x[i] for i in model.objective)
+        for indexes, rhs in model.at_most:
+            problem += pulp.lpSum(x[i] for i in indexes) <= rhs
+        for indexes in model.exactly_one:
+            problem += pulp.lpSum(x[i] for i in indexes) == 1
+        for a, b in model.implications:
+            problem += x[a] <= x[b]
+
+        hint = set(hint)
+        if hint:
+            for i in model.objective:
+                x[i].setInitialValue(1 if i in hint else 0)
+
+        # CBC counts whole seconds, and can't stop inside its root LP - hence values_per_second
+        time_left = deadline - time.time()
+        if time_left < 1:
+            logger.info("No time left for CBC after building the problem")
+            return ExactResult("unknown")
+        problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=int(time_left), threads=workers,
+                                        warmStart=bool(hint)))
+
+        statuses = {pulp.LpSolutionOptimal: "optimal", pulp.LpSolutionIntegerFeasible: "feasible",
+                    pulp.LpSolutionInfeasible: "infeasible"}
+        status = statuses.get(problem.sol_status, "unknown")
+        if status not in ("optimal", "feasible"):
+            return ExactResult(status)
+        chosen = [i for i in model.objective if (x[i].varValue or 0) > 0.5]
+        return ExactResult(status, chosen, len(chosen) if status == "optimal" else None)
+
+
+# Backends in order of preference
+BACKENDS = {}
+
+
+def register_backend(backend_class):
+    """Make an ExactBackend subclass available by its name"""
+    BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+register_backend(CpSatBackend)
+register_backend(PulpBackend)
+
+
+def available_backends():
+    """Names of the registered backends whose solver library is installed"""
+    return [name for name, backend_class in BACKENDS.items() if backend_class.available()]
+
+
+def get_backend(backend=None):
+    """An ExactBackend instance from a name, an instance or None (first available)
+
+    Raises ValueError for an unknown name and RuntimeError when the solver library
+    is missing.
+    """
+    if isinstance(backend, ExactBackend):
+        return backend
+    if backend is None:
+        names = available_backends()
+        if not names:
+            raise RuntimeError("Exact solving needs OR-Tools (pip install ortools) or PuLP (pip install pulp)")
+        backend = names[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown exact backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+    if not BACKENDS[backend].available():
+        raise RuntimeError(f"Exact backend '{backend}' is not installed")
+    return BACKENDS[backend]()
+
+
+def solve_exact(solver, backend=None, workers=None, deadline=None):
+    """Place the sessions with an exact backend and return the assignments
+
+    The model is built from the solver's propagated domains (see build_model). One
+    greedy attempt warm-starts the backend and is kept if the backend finds nothing
+    better by `deadline` (a time.time() value, default the solver's); the backend
+    stops early at target_count. Model building and loading count against the
+    deadline. The backend is skipped - and greedy restarts run for half of the time
+    left instead, leaving the rest to the caller's repair - when that attempt already
+    meets the solver's targets, or when the model is too large for the time left
+    (see ExactBackend.values_per_second). The outcome - backend, status, proven upper
+    bound (the tighter of the backend's and preprocessing's), model size and why the
+    backend was skipped, if it was - is kept in solver.exact_report.
+    """
+    backend = get_backend(backend)
+    deadline = deadline if deadline is not None else solver.deadline
+    start = time.perf_counter()
+
+    n_values = model_size(solver)
+    skipped = None
+    if not backend.fits(n_values, deadline - time.time()):
+        skipped = "model too large for the time left"
+        logger.info("Exact model (%s): %d values won't load and solve in %.1fs - greedy attempts instead",
+                    backend.name, n_values, max(0.0, deadline - time.time()))
+        best_assignments = solver._solve_greedy(time.time() + max(0.0, deadline - time.time()) / 2)
+    else:
+        # Warm start: one greedy attempt (it also is the answer if the backend runs out of time)
+        best_assignments = solver._solve_greedy(time.time())
+        solver.reset_assignments(best_assignments)
+        if solver._targets_met():
+            skipped = "targets met by the warm start"
+            logger.info("Greedy warm start already meets the targets - skipping the %s backend", backend.name)
+        solver.reset_assignments()
+
+    model = None
+    result = ExactResult("unknown")
+    if skipped is None:
+        model = build_model(solver, deadline)
+        if model is None:
+            skipped = "time ran out while building the model"
+            logger.info("Time ran out while building the exact model")
+    if model is not None:
+        logger.info("Exact model (%s): %d variables, %d constraints, built in %.2fs", backend.name,
+                    model.n_vars, model.n_constraints, time.perf_counter() - start)
+        index_of = {value: index for index, value in enumerate(model.values)}
+        encoder = solver.domain_encoder
+        hint = [index_of[(v, encoder.encode(*a))] for v, a in best_assignments.items() if (v, encoder.encode(*a)) in index_of]
+        stop_at = solver.target_count if solver.target_soft_score is None else None
+        result = backend.solve(model, max(0.0, deadline - time.time()), workers=workers, stop_at=stop_at, hint=hint)
+
+    if len(result.chosen) > len(best_assignments):
+        best_assignments = {}
+        for index in result.chosen:
+            variable, code = model.values[index]
+            best_assignments[variable] = solver.domain_encoder.decode(code)
+
+    bound = result.bound
+    if solver.preprocessing is not None:
+        max_schedulable = solver.preprocessing['max_schedulable']
+        bound = max_schedulable if bound is None else min(bound, max_schedulable)
+    status = result.status
+    if bound is not None and len(best_assignments) >= bound:
+        status = "optimal"
+    elif status in ("unknown", "infeasible") and best_assignments:
+        status = "feasible"  # Only the greedy attempts placed sessions
+
+    solver.exact_report = {
+        'backend': backend.name,
+        'status': status,
+        'placed': len(best_assignments),
+        'upper_bound': bound,
+        'values': n_values,
+        'variables': model.n_vars if model is not None else None,
+        'constraints': model.n_constraints if model is not None else None,
+        'skipped': skipped,
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+    logger.info("Exact solve (%s): %s, %d sessions placed (upper bound %s)", backend.name, status,
+                len(best_assignments), bound)
+    return best_assignments
@@ -0,0 +1,170 @@
+# parallel_solver.py - Multi-start greedy solving across CPU cores
+import logging
+import os
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Per-process state: init_worker() stores the problem data once when the pool starts,
+# the first attempt builds the solver and the following attempts reuse it
+_worker_problem = None
+_worker_stop = None
+_worker_pinned = ()
+_worker_solver = None
+
+
+def pool_context():
+    """Start method for solver process pools: forkserver, or spawn where it is unavailable
+
+    The pools are started from the web app's job threads, and a forked child can inherit
+    a lock another thread was holding at fork time and deadlock on it.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def init_worker(courses, instructors, rooms, timeslots, stop_event, pinned=(), cohorts=()):
+    """Pool initializer: receive the problem data (and any pinned sessions) once per worker process"""
+    global _worker_problem, _worker_stop, _worker_pinned, _worker_solver
+    _worker_problem = (courses, instructors, rooms, timeslots, list(cohorts))
+    _worker_stop = stop_event
+    _worker_pinned = pinned
+    _worker_solver = None  # Built from this data on first use
+
+
+def _get_worker_solver():
+    """The worker's solver with variables and propagated domains, built on first use"""
+    global _worker_solver
+    if _worker_solver is None:
+        from enhanced_csp_model import EnhancedCSPTimetable
+
+        solver = EnhancedCSPTimetable(*_worker_problem)
+        solver.stop_event = _worker_stop
+        solver.data_warnings = False
+        solver.create_variables()
+        if _worker_pinned:
+            solver.pin_assignments(_worker_pinned)
+        solver.create_domains()
+        solver.propagate_constraints()
+        _worker_solver = solver
+    return _worker_solver
+
+
+def run_attempt(seed, deadline=None):
+    """Run one randomized greedy attempt inside a worker
+
+    Domains are built once per worker process; each attempt only resets the
+    assignments, and stops placing sessions once `deadline` (a time.time() value)
+    passes. Returns (seed, [(course_id, section_id, code), ...], soft_score,
+    diagnostics) where code is the packed (timeslot, room, instructor) value, so no
+    solver objects are pickled back.
+    """
+    solver = _get_worker_solver()
+    solver.rng.seed(seed)
+    solver.deadline = deadline
+    solver.diagnostics.reset()
+    solver.reset_assignments(solver.pinned)
+    solver._greedy_schedule()
+
+    encoder = solver.domain_encoder
+    placed = [(v.course_id, v.section_id, encoder.encode(*a)) for v, a in solver.assignments.items()]
+    return seed, placed, solver.schedule_soft_score(), solver.diagnostics.to_dict()
+
+
+def solve_parallel(solver, workers=None, deadline=None):
+    """Run independent greedy attempts in a process pool and return the best assignments
+
+    Each attempt gets its own seed and runs on its worker's own EnhancedCSPTimetable.
+    New attempts keep starting until `deadline` (a time.time() value, default the
+    solver's) passes; once the best attempt meets the solver's targets the remaining
+    work is cancelled. Best means most sessions placed, then lowest soft score.
+    Results are taken in seed order (early finishers wait for the attempts before
+    them), so the same solver seed stops on the same attempt however workers race.
+    At the deadline, attempts that finished behind a still-running one are taken too.
+    The solver must already have variables, domains, a preprocessing report and
+    targets (see solve_enhanced).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    deadline = deadline if deadline is not None else solver.deadline
+    total = len(solver.variables)
+    target = solver.target_count if solver.target_count is not None else solver.preprocessing['max_schedulable']
+
+    by_key = {(v.course_id, v.section_id): v for v in solver.variables}
+    base_seed = solver.rng.randrange(2 ** 31)  # Attempt i runs with base_seed + i
+    context = pool_context()
+    stop_event = context.Event()
+
+    logger.info("Running greedy attempts on %d worker processes (%.1fs budget)", workers,
+                max(0.0, deadline - time.time()))
+
+    best_assignments = {}
+    best_key = None
+    attempts = 0
+
+    def consider(result):
+        """Fold one attempt's result into the best so far; True once the best meets the targets"""
+        nonlocal best_assignments, best_key, attempts
+        seed, placed, soft_score, diagnostics = result
+        attempts += 1
+        solver._report_progress("attempt", attempt=attempts, workers=workers)
+        solver.diagnostics.merge(diagnostics)  # Worker time adds up across processes
+        solver.diagnostics.count("attempts")
+        key = (len(placed), -soft_score)
+        if best_key is None or key > best_key:
+            if best_key is None or key[0] > best_key[0]:
+                logger.info("New best: %d/%d sessions scheduled (seed %d)", len(placed), total, seed)
+            best_key = key
+            best_assignments = {
+                by_key[(course_id, section_id)]: solver.domain_encoder.decode(code)
+                for course_id, section_id, code in placed
+            }
+            solver._report_best(best_assignments)
+        return best_key[0] >= target and (solver.target_soft_score is None or
+                                          -best_key[1] <= solver.target_soft_score)
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(solver.courses, solver.instructors, solver.rooms, solver.timeslots, stop_event,
+                  solver.pinned_entries, solver.cohorts),
+    )
+    try:
+        running = set()
+        finished = {}  # seed -> result of attempts that finished ahead of an earlier seed
+        submitted = completed = 0
+        targets_met = False
+        while not targets_met:
+            # Keep every worker busy while there is time for another attempt
+            while len(running) < workers and time.time() < deadline:
+                running.add(executor.submit(run_attempt, base_seed + submitted, deadline))
+                submitted += 1
+            if not running:
+                break
+            done, running = wait(running, timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            if not done:
+                logger.info("Time limit reached after %d attempts", completed + len(finished))
+                break
+
+            for future in done:
+                result = future.result()
+                finished[result[0]] = result
+            while base_seed + completed in finished and not targets_met:
+                targets_met = consider(finished.pop(base_seed + completed))
+                completed += 1
+
+        if targets_met:
+            logger.debug("Targets met (%d/%d) - cancelling remaining attempts", best_key[0], total)
+        else:
+            # Out of time with earlier seeds still running: the later ones that did finish still count
+            for seed in sorted(finished):
+                if consider(finished[seed]):
+                    break
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return best_assignments
@@ -0,0 +1,125 @@
+# result_cache.py - Content-addressed cache of generated timetables
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from enhanced_csp_model import parse_unavailable_days
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(payload):
+    """SHA-256 of a JSON-serializable payload with a canonical encoding"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def dataset_fingerprint(courses, instructors, rooms, timeslots, cohorts=()):
+    """Stable hash of the normalized input data
+
+    Row order, qualification order and 'Not on <Day>' spelling don't change the
+    fingerprint; any edit to a field the solver reads does.
+    """
+    normalized = {
+        "courses": sorted(
+            (c.course_id, c.name, str(c.credits), c.type, str(c.enrollment), str(c.sections)) for c in courses),
+        "instructors": sorted(
+            (i.instructor_id, i.name, i.role,
+             sorted(parse_unavailable_days(i.unavailable_day)),
+             sorted(c.strip() for c in i.qualified_courses if c.strip()))
+            for i in instructors),
+        "rooms": sorted(
+            (r.room_id, r.type, str(r.capacity)) for r in rooms),
+        "timeslots": sorted(
+            (t.day, t.start_time, t.end_time) for t in timeslots),
+    }
+    if cohorts:
+        normalized["cohorts"] = sorted((c.cohort_id, sorted(c.course_ids)) for c in cohorts)
+    return _digest(normalized)
+
+
+def cache_key(fingerprint, **params):
+    """Key for one solve: the dataset fingerprint plus the solver parameters"""
+    return _digest({"data": fingerprint, "params": params})
+
+
+class ResultCache:
+    """LRU cache of export_to_dict() results with an optional on-disk store
+
+    Entries live in memory up to max_entries; with a directory every entry is also
+    written as <key>.json, so results survive restarts and evicted entries can be
+    read back.
+    """
+
+    def __init__(self, max_entries=32, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+            elif self.directory and os.path.exists(self._path(key)):
+                try:
+                    with open(self._path(key), "r", encoding="utf-8") as file:
+                        result = json.load(file)
+                except (OSError, ValueError) as e:
+                    logger.warning("Ignoring unreadable cache entry %s: %s", key[:12], e)
+                else:
+                    self._remember(key, result)
+
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+
+    def put(self, key, result):
+        """Store a result under key"""
+        with self.lock:
+            self._remember(key, result)
+            if self.directory:
+                # Write-then-rename so a crash never leaves a half-written entry
+                temp_path = self._path(key) + ".tmp"
+                try:
+                    with open(temp_path, "w", encoding="utf-8") as file:
+                        json.dump(result, file)
+                    os.replace(temp_path, self._path(key))
+                except (OSError, TypeError) as e:
+                    logger.warning("Could not write cache entry %s: %s", key[:12], e)
+
+    def _remember(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every in-memory entry (the on-disk store is left alone)"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Size and hit/miss counters"""
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "directory": self.directory,
+            }
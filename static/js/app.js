@@ -345,7 +345,15 @@ async function handleGenerate(e) {
             })
         });
         
-        const data = await response.json();
+        const job = await response.json();
+        // A cached result is the timetable itself: its success flag means "all placed"
+        if (!job.cached && !job.success) {
+            throw new Error(job.error || 'Failed to start generation');
+        }
+        
+        // Cached results come back right away, otherwise generation runs as a
+        // background job - follow its event stream until it finishes
+        const data = job.cached ? job : await streamGenerationJob(job.job_id);
         
         // Hide progress
         document.getElementById('generation-progress').classList.add('hidden');
@@ -363,6 +371,94 @@ async function handleGenerate(e) {
     }
 }
 
+function streamGenerationJob(jobId) {
+    if (!window.EventSource) {
+        return pollGenerationJob(jobId);
+    }
+    
+    const progressMessage = document.getElementById('progress-message');
+    const progress = {};
+    const schedule = new Map();  // "course_id|section_id" -> schedule entry, built from deltas
+    
+    return new Promise(resolve => {
+        const source = new EventSource(`/api/jobs/${jobId}/events`);
+        let settled = false;
+        
+        const onProgress = (e) => {
+            Object.assign(progress, JSON.parse(e.data));
+            progressMessage.textContent = describeJobProgress(progress);
+        };
+        ['started', 'attempt', 'progress', 'best', 'improved', 'finished'].forEach(name => {
+            source.addEventListener(name, onProgress);
+        });
+        
+        source.addEventListener('delta', (e) => {
+            const delta = JSON.parse(e.data);
+            delta.removed.forEach(([courseId, sectionId]) => schedule.delete(`${courseId}|${sectionId}`));
+            delta.added.forEach(entry => schedule.set(`${entry.course_id}|${entry.section_id}`, entry));
+            progressMessage.textContent = describeJobProgress(progress) + ` · ${schedule.size} sessions in view`;
+        });
+        
+        source.addEventListener('result', (e) => {
+            settled = true;
+            source.close();
+            resolve({ ...JSON.parse(e.data), schedule: Array.from(schedule.values()) });
+        });
+        
+        source.addEventListener('failed', (e) => {
+            settled = true;
+            source.close();
+            resolve({ success: false, error: JSON.parse(e.data).error });
+        });
+        
+        // Streams can be cut by proxies - fall back to polling the job
+        source.onerror = () => {
+            if (!settled) {
+                settled = true;
+                source.close();
+                resolve(pollGenerationJob(jobId));
+            }
+        };
+    });
+}
+
+async function pollGenerationJob(jobId) {
+    const progressMessage = document.getElementById('progress-message');
+    
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        
+        const response = await fetchWithCacheBust(`/api/jobs/${jobId}`);
+        const job = await response.json();
+        
+        if (job.status === 'finished') {
+            return job.result;
+        }
+        if (job.status === 'failed' || response.status === 404) {
+            return { success: false, error: job.error };
+        }
+        
+        progressMessage.textContent = describeJobProgress(job.progress || {});
+    }
+}
+
+function describeJobProgress(progress) {
+    const parts = [];
+    if (progress.attempt) {
+        parts.push(progress.max_attempts ? `Attempt ${progress.attempt}/${progress.max_attempts}` : `Attempt ${progress.attempt}`);
+    }
+    if (progress.processed !== undefined) {
+        parts.push(`${progress.scheduled}/${progress.total} sessions placed`);
+    }
+    if (progress.best !== undefined) {
+        parts.push(`best so far: ${progress.best}/${progress.total}`);
+    }
+    if (progress.soft_score !== undefined) {
+        parts.push(`soft score ${progress.soft_score.toFixed(1)}`);
+    }
+    return parts.length ? parts.join(' · ') : 'Scheduling ALL courses across all time slots...';
+}
+
 function displayResults(data) {
     const resultsSection = document.getElementById('generation-results');
     resultsSection.classList.remove('hidden');
@@ -1021,10 +1117,10 @@ function displayTimetableByDay(schedule) {
                     let displayType = entry.course_type;
                     let classType = 'lecture';
                     
-                    if (entry.section_id === 'LAB') {
+                    if (entry.section_id.startsWith('LAB')) {
                         displayType = 'Lab Session';
                         classType = 'lab';
-                    } else if (entry.section_id === 'LECTURE') {
+                    } else if (entry.section_id.startsWith('LECTURE')) {
                         displayType = 'Lecture Session';
                         classType = 'lecture';
                     } else if (entry.course_type.includes('Lab')) {
@@ -1399,7 +1495,7 @@ function showUploadModal() {
     modal.style.display = 'flex';
     
     // Add file change listeners
-    const fileInputs = ['courses', 'instructors', 'rooms', 'timeslots'];
+    const fileInputs = ['courses', 'instructors', 'rooms', 'timeslots', 'cohorts'];
     fileInputs.forEach(type => {
         const input = document.getElementById(`${type}-file-modal`);
         const nameSpan = document.getElementById(`${type}-file-name`);
@@ -1425,7 +1521,7 @@ function closeUploadModal() {
     form.reset();
     
     // Reset file names
-    const fileTypes = ['courses', 'instructors', 'rooms', 'timeslots'];
+    const fileTypes = ['courses', 'instructors', 'rooms', 'timeslots', 'cohorts'];
     fileTypes.forEach(type => {
         const nameSpan = document.getElementById(`${type}-file-name`);
         nameSpan.textContent = 'No file selected';
@@ -1442,6 +1538,7 @@ async function handleModalUpload() {
     const instructorsFile = document.getElementById('instructors-file-modal').files[0];
     const roomsFile = document.getElementById('rooms-file-modal').files[0];
     const timeslotsFile = document.getElementById('timeslots-file-modal').files[0];
+    const cohortsFile = document.getElementById('cohorts-file-modal').files[0];  // Optional
     
     // Validate all files are selected
     if (!coursesFile || !instructorsFile || !roomsFile || !timeslotsFile) {
@@ -1453,6 +1550,9 @@ async function handleModalUpload() {
     formData.append('instructors', instructorsFile);
     formData.append('rooms', roomsFile);
     formData.append('timeslots', timeslotsFile);
+    if (cohortsFile) {
+        formData.append('cohorts', cohortsFile);
+    }
     
     // Show progress
     const progressDiv = document.getElementById('upload-progress');
@@ -0,0 +1,120 @@
+# vector_scoring.py - Optional NumPy batch scoring of candidate assignments
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional - the solver falls back to per-candidate scoring
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+class VectorScorer:
+    """Scores a whole packed domain at once with the solver's soft constraints
+
+    Per-entity tables (slot day, slot penalty, slot position, small rooms) are built once;
+    the load vectors are read from the solver's running counters on every call. The
+    result matches EnhancedCSPTimetable.calculate_soft_constraint_score term by term.
+    """
+
+    def __init__(self, solver):
+        if not HAS_NUMPY:
+            raise RuntimeError("VectorScorer requires NumPy")
+        self.solver = solver
+        self.encoder = encoder = solver.domain_encoder
+
+        self.days = sorted({t.day for t in encoder.timeslots})
+        day_index = {day: i for i, day in enumerate(self.days)}
+        self.instructor_ids = [ins.instructor_id for ins in encoder.instructors]
+
+        self.slot_day = np.array([day_index[t.day] for t in encoder.timeslots], dtype=np.int64)
+        # SOFT CONSTRAINT 1: light penalty for early/late slots
+        self.slot_penalty = np.array(
+            [0.5 * (t.start_time == "9:00 AM") + 0.5 * (t.start_time == "2:15 PM") for t in encoder.timeslots])
+        positions = [solver.slot_position.get(t.id) for t in encoder.timeslots]
+        self.slot_position = np.array([-1 if p is None else p for p in positions], dtype=np.int64)
+        # SOFT CONSTRAINT 4: small rooms for lecture courses
+        self.room_small = np.array([room.capacity < 50 for room in encoder.rooms], dtype=np.float64)
+
+    def _load_vectors(self):
+        """Day load, instructor load, instructor x day slot masks and daily loads as arrays"""
+        solver = self.solver
+        day_load = np.array([solver.day_load.get(day, 0) for day in self.days], dtype=np.float64)
+        instructor_load = np.array(
+            [solver.instructor_workload.get(i, 0) for i in self.instructor_ids], dtype=np.float64)
+        day_masks = np.zeros((len(self.instructor_ids), len(self.days)), dtype=np.int64)
+        day_counts = np.zeros((len(self.instructor_ids), len(self.days)), dtype=np.int64)
+        index = self.encoder.instructor_index
+        day_index = {day: i for i, day in enumerate(self.days)}
+        for (instructor_id, day), mask in solver.instructor_day_slots.items():
+            if mask and instructor_id in index:
+                day_masks[index[instructor_id], day_index[day]] = mask
+        for (instructor_id, day), count in solver.instructor_day_load.items():
+            if instructor_id in index:
+                day_counts[index[instructor_id], day_index[day]] = count
+        return day_load, instructor_load, day_masks, day_counts
+
+    def scores(self, variable, domain):
+        """Soft-constraint score (lower is better) and hard-constraint validity of every value
+
+        Validity covers the dynamic hard constraints (room and instructor double-booking,
+        the 4-per-day limit, lecture and lab sections of one course or courses of one cohort
+        sharing a slot); the static ones are already guaranteed by domain construction.
+        """
+        encoder = self.encoder
+        codes = np.frombuffer(domain.codes, dtype=np.uint32 if domain.codes.itemsize == 4 else np.uint64)
+        codes = codes.astype(np.int64)
+        rest, instructor = np.divmod(codes, encoder.n_instructors)
+        slot, room = np.divmod(rest, encoder.n_rooms)
+        day = self.slot_day[slot]
+
+        day_load, instructor_load, day_masks, day_counts = self._load_vectors()
+
+        # HARD CONSTRAINTS 4-8 against the occupancy masks
+        room_busy = np.frombuffer(encoder.slot_room_busy, dtype=np.uint8)
+        instructor_busy = np.frombuffer(encoder.slot_instructor_busy, dtype=np.uint8)
+        valid = (room_busy[rest] == 0) & (instructor_busy[slot * encoder.n_instructors + instructor] == 0)
+        valid &= day_counts[instructor, day] < 4
+        clash_slots = [
+            encoder.slot_index[t.id] for t in encoder.timeslots
+            if self.solver.course_slot_clash(variable, t) or self.solver.cohort_clash(variable, t)
+        ]
+        if clash_slots:
+            valid &= ~np.isin(slot, clash_slots)
+
+        # SOFT CONSTRAINTS 1-3: slot penalty, day balance, instructor workload
+        score = self.slot_penalty[slot] + day_load[day] * 0.5 + instructor_load[instructor] * 0.3
+
+        # SOFT CONSTRAINT 4: prefer larger rooms for lecture courses
+        course = self.solver.course_by_id.get(variable.course_id)
+        if course and "Lab" not in course.type:
+            score += self.room_small[room]
+
+        # SOFT CONSTRAINT 5: bonus for each busy neighbouring slot of the same instructor
+        position = self.slot_position[slot]
+        mask = day_masks[instructor, day]
+        standard = position >= 0
+        before = np.where(position > 0, (mask >> np.maximum(position - 1, 0)) & 1, 0)
+        after = np.where(standard, (mask >> (position + 1)) & 1, 0)
+        score -= 2 * (before + after)
+
+        # Add randomness to explore more possibilities
+        rng = np.random.default_rng(self.solver.rng.getrandbits(64))
+        score += rng.uniform(-0.5, 0.5, size=len(score))
+        return codes, score, valid
+
+    def order(self, variable, domain, top_k=100):
+        """Best `top_k` currently valid values of the full domain in score order
+
+        All valid values are returned when top_k is None.
+        """
+        if not len(domain):
+            return []
+        codes, score, valid = self.scores(variable, domain)
+        codes, score = codes[valid], score[valid]
+        if top_k is not None and len(score) > top_k:
+            best = np.argpartition(score, top_k)[:top_k]
+            best = best[np.argsort(score[best], kind="stable")]
+        else:
+            best = np.argsort(score, kind="stable")
+        decode = self.encoder.decode
+        return [decode(int(code)) for code in codes[best]]